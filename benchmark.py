@@ -0,0 +1,156 @@
+import argparse
+import glob
+import json
+import random
+import subprocess
+import sys
+import time
+
+
+def time_python(code, repeat=3):
+    # fresh interpreters so every run pays the full import cost
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark_imports(repeat):
+    lazy = time_python("import reader", repeat)
+    eager = time_python(
+        "import reader, models; models.get_layout(); models.get_layout(force_ocr=True)",
+        repeat,
+    )
+    print(f"import reader:                      {lazy:.2f}s")
+    print(f"import reader + build PDF pipelines: {eager:.2f}s (previous import cost)")
+    print(f"saved on runs that never read a PDF: {eager - lazy:.2f}s")
+
+
+PDF_RUN = """
+import json, sys, time
+import models
+
+try:
+    import resource  # peak memory is only reported where the stdlib exposes it
+    peak_rss_mb = lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    peak_rss_mb = lambda: None
+
+start = time.perf_counter()
+layout = models.get_layout(text_only=sys.argv[1] == "text")
+setup = time.perf_counter() - start
+texts = []
+start = time.perf_counter()
+for pdf_loc in sys.argv[2:]:
+    texts.append(layout(pdf_loc).text)
+print(json.dumps({
+    "setup": setup,
+    "extract": time.perf_counter() - start,
+    "peak_rss_mb": peak_rss_mb(),
+    "texts": texts,
+}))
+"""
+
+
+def sample_pdfs(sample, seed=0):
+    pdf_locs = sorted(glob.glob("output/pdfs/**/*.pdf", recursive=True))
+    return random.Random(seed).sample(pdf_locs, min(sample, len(pdf_locs)))
+
+
+def run_pdf_pipeline(pipeline, pdf_locs):
+    # each pipeline runs in its own interpreter so peak memory is not shared
+    out = subprocess.run(
+        [sys.executable, "-c", PDF_RUN, pipeline, *pdf_locs],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def benchmark_pdfs(sample):
+    pdf_locs = sample_pdfs(sample)
+    if not pdf_locs:
+        print("No PDFs found under output/pdfs")
+        return
+    results = {
+        pipeline: run_pdf_pipeline(pipeline, pdf_locs) for pipeline in ("model", "text")
+    }
+    for pipeline, result in results.items():
+        memory = result["peak_rss_mb"]
+        print(
+            f"{pipeline:>5}: setup {result['setup']:.2f}s, "
+            f"{len(pdf_locs) / result['extract']:.2f} PDFs/s, "
+            f"peak RSS {f'{memory:.0f} MB' if memory is not None else 'n/a'}"
+        )
+    mismatches = [
+        pdf_loc
+        for pdf_loc, model_text, text in zip(
+            pdf_locs, results["model"]["texts"], results["text"]["texts"]
+        )
+        if model_text != text
+    ]
+    print(f"identical Content: {len(pdf_locs) - len(mismatches)}/{len(pdf_locs)}")
+    for pdf_loc in mismatches:
+        print(f"  differs: {pdf_loc}")
+
+
+def time_parser(parse_func, pages):
+    start = time.perf_counter()
+    results = []
+    for html in pages:
+        try:
+            results.append(parse_func(html))
+        except Exception as e:
+            results.append(repr(e))
+    return time.perf_counter() - start, results
+
+
+def benchmark_parsers():
+    # both parsing paths over every saved snapshot, output must match exactly
+    import html_rules
+    import reader
+    from config import ORG_NAMES
+    from snapshot_store import snapshot_store
+
+    for org in ORG_NAMES:
+        for is_archive in (False, True):
+            parse_func = reader.html_parser(org, is_archive)
+            if parse_func is None:
+                continue
+            urls, pages = [], []
+            for url, html in snapshot_store.latest(org, is_archive):
+                urls.append(url)
+                pages.append(html)
+            if not pages:
+                continue
+            html_rules.FAST_HTML_PARSING = False
+            slow, expected = time_parser(parse_func, pages)
+            html_rules.FAST_HTML_PARSING = True
+            fast, actual = time_parser(parse_func, pages)
+            mismatches = [url for url, a, b in zip(urls, expected, actual) if a != b]
+            label = f"{org} ({'archived' if is_archive else 'current'})"
+            print(
+                f"{label}: {len(pages)} pages, html.parser {len(pages) / slow:.1f}/s, "
+                f"lxml {len(pages) / fast:.1f}/s ({slow / fast:.1f}x), "
+                f"identical {len(pages) - len(mismatches)}/{len(pages)}"
+            )
+            for url in mismatches:
+                print(f"  differs: {url}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("benchmark", choices=["imports", "pdfs", "parsers"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sample", type=int, default=20)
+    args = parser.parse_args()
+    match args.benchmark:
+        case "imports":
+            benchmark_imports(args.repeat)
+        case "pdfs":
+            benchmark_pdfs(args.sample)
+        case "parsers":
+            benchmark_parsers()
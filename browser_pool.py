@@ -0,0 +1,93 @@
+from config import BROWSER_POOL_SIZE, BROWSER_MAX_PAGES, BROWSER_HEADLESS
+from contextlib import contextmanager
+import threading
+
+
+class BrowserPool:
+    def __init__(self, size, max_pages, page_load_strategy):
+        self.max_pages = max_pages
+        self.page_load_strategy = page_load_strategy
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def create(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.page_load_strategy = self.page_load_strategy
+        if BROWSER_HEADLESS:
+            options.add_argument("--headless=new")
+        driver = webdriver.Chrome(options=options)
+        driver.implicitly_wait(5)
+        return driver
+
+    @staticmethod
+    def is_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @contextmanager
+    def checkout(self):
+        self.slots.acquire()
+        driver = None
+        try:
+            with self.lock:
+                if self.idle:
+                    driver, pages = self.idle.pop()
+            if driver is None:
+                driver, pages = self.create(), 0
+            try:
+                yield driver
+            except Exception:
+                # a missing element is an ordinary failure, a dead session is not
+                if not self.is_alive(driver):
+                    driver.quit()
+                    driver = None
+                raise
+            finally:
+                if driver is not None:
+                    pages += 1
+                    if pages >= self.max_pages:
+                        driver.quit()
+                    else:
+                        driver.switch_to.default_content()
+                        with self.lock:
+                            self.idle.append((driver, pages))
+        finally:
+            self.slots.release()
+
+    def shutdown(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for driver, _ in idle:
+            driver.quit()
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(page_load_strategy="normal"):
+    # drivers are only started the first time a page is actually needed
+    with pools_lock:
+        if page_load_strategy not in pools:
+            pools[page_load_strategy] = BrowserPool(
+                BROWSER_POOL_SIZE, BROWSER_MAX_PAGES, page_load_strategy
+            )
+        return pools[page_load_strategy]
+
+
+def checkout(page_load_strategy="normal"):
+    return get_pool(page_load_strategy).checkout()
+
+
+def shutdown():
+    with pools_lock:
+        current = list(pools.values())
+    for pool in current:
+        pool.shutdown()
@@ -0,0 +1,97 @@
+from config import LINK_CSV_FIELDS
+from row_store import load_links
+from urllib.parse import urlsplit
+import pandas as pd
+import argparse
+import os
+import re
+
+MERGED_LINKS_CSV = "output/links/merged_wayback_article_links.csv"
+
+WAYBACK_URL = re.compile(r"https?://web\.archive\.org/web/\d{1,14}(?:[a-z]{2}_)?/(.+)")
+
+
+def original_url(url):
+    match = WAYBACK_URL.match(url)
+    return match.group(1) if match else url
+
+
+def canonical_url(url, keep_query=True):
+    # one key for every form a link takes: live or any Wayback capture, http or
+    # https, with or without "www.", an explicit default port or a trailing slash
+    parts = urlsplit(original_url(url.strip()))
+    host = parts.netloc.lower().removesuffix(":80").removesuffix(":443")
+    host = host.removeprefix("www.")
+    path = parts.path.rstrip("/") or "/"
+    # query strings on PDF links can stamp a file version (Suncor's ?modified=),
+    # so they are only dropped when grouping the versions of one release
+    if not parts.query or (not keep_query and path.lower().endswith(".pdf")):
+        return host + path
+    return f"{host}{path}?{parts.query}"
+
+
+class CanonicalIndex:
+    def __init__(self, urls=(), keep_query=True):
+        # canonical key -> variants in the order they were first seen
+        self.keep_query = keep_query
+        self.variants = {}
+        for url in urls:
+            self.add(url)
+
+    def key(self, url):
+        return canonical_url(url, self.keep_query)
+
+    def add(self, url):
+        variants = self.variants.setdefault(self.key(url), [])
+        if url not in variants:
+            variants.append(url)
+
+    def variants_of(self, url):
+        return self.variants.get(self.key(url), [url])
+
+    def representatives(self):
+        # the work for an article is done once, on the first variant seen
+        return [variants[0] for variants in self.variants.values()]
+
+    def __len__(self):
+        return len(self.variants)
+
+
+def collection_links(is_archive):
+    # readers take archived links from the merged list, with Wayback URLs resolved
+    if is_archive:
+        if not os.path.exists(MERGED_LINKS_CSV):
+            return pd.DataFrame(columns=LINK_CSV_FIELDS)
+        return pd.read_csv(MERGED_LINKS_CSV)
+    return load_links(False)
+
+
+def link_variants(organization, is_archive, keep_query=True):
+    links = collection_links(is_archive)
+    return CanonicalIndex(
+        links[links["Organization"] == organization]["Link"].to_list(), keep_query
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["stats", "show"])
+    args = parser.parse_args()
+    for is_archive in (False, True):
+        links = collection_links(is_archive)
+        label = "archived" if is_archive else "current"
+        for organization in links["Organization"].unique():
+            index = link_variants(organization, is_archive)
+            match args.command:
+                case "stats":
+                    count = sum(len(variants) for variants in index.variants.values())
+                    releases = len(link_variants(organization, is_archive, False))
+                    print(
+                        f"{organization} ({label}): {count} links, {len(index)} articles, {releases} releases"
+                    )
+                case "show":
+                    for key, variants in index.variants.items():
+                        if len(variants) > 1:
+                            print(f"{organization} ({label}) {key}")
+                            for variant in variants:
+                                print(f"    {variant}")
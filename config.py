@@ -1,3 +1,5 @@
+import os
+
 WAYBACK_ENDPOINT = "http://web.archive.org/cdx/search/cdx"
 WAYBACK_PREFIX = "http://web.archive.org/web"
 BILL_C59_ROYAL_ASSENT_DATE = 20240620000000
@@ -32,3 +34,147 @@ WAYBACK_ORGS = [
     "Shell Canada",
 ]  # organizations that have stopped hosting links found in the wayback archive completely
 ARTICLE_CSV_FIELDS = ["Organization", "Link", "Content"]
+# "parquet" partitioned store, "sqlite" the row store, "csv" output/content CSVs
+CONTENT_BACKEND = "parquet"
+CONTENT_STORE_DIR = "output/content/store"
+LINK_BACKEND = "sqlite"  # "sqlite" the row store, "csv" the output/links CSVs
+ROW_STORE_PATH = "output/store.sqlite"
+ROW_STORE_BATCH_SIZE = 500  # rows written per transaction
+WAYBACK_MAX_WORKERS = 8  # concurrent CDX lookups
+WAYBACK_RATE = 4  # CDX requests per second shared by all workers
+WAYBACK_BURST = 8
+WAYBACK_CACHE_PATH = "output/cache/wayback_cdx.sqlite"
+WAYBACK_CACHE_TTL = 30 * 24 * 60 * 60  # seconds a resolved snapshot is trusted
+WAYBACK_CACHE_NEGATIVE_TTL = (
+    7 * 24 * 60 * 60
+)  # seconds a "no snapshot" answer is trusted
+WAYBACK_CACHE_MAX_ENTRIES = 100000
+WAYBACK_OFFLINE = False  # only answer CDX lookups from the cache
+WAYBACK_INDEX_PREFIXES = {
+    "Suncor Energy": [
+        "sustainability-prd-cdn.suncor.com/-/media/project/suncor/files/news-releases/"
+    ],
+    "Imperial Oil": ["news.imperialoil.ca/news-releases/news-releases/"],
+    "Shell Canada": ["www.shell.ca/en_ca/media/news-and-media-releases/"],
+}  # URL spaces pulled in bulk from the CDX API for WAYBACK_ORGS
+WAYBACK_INDEX_PAGE_SIZE = 5000
+PDF_DOWNLOAD_WORKERS = 8
+PDF_DEFAULT_HOST_CONCURRENCY = 4  # parallel downloads per host
+PDF_HOST_CONCURRENCY = {"web.archive.org": 2}
+PDF_MANIFEST_PATH = "output/pdfs/manifest.sqlite"
+PDF_OBJECT_DIR = "output/pdfs/objects"  # content-addressed PDFs, named by sha256
+CANONICAL_SHARE_ARCHIVES = False  # live and Wayback copies of a PDF share one file
+PAGE_CACHE_PATH = "output/cache/pages.sqlite"
+INCREMENTAL_REFRESH = False  # send stored ETag/Last-Modified and reuse content on 304
+BROWSER_POOL_SIZE = 4  # Chrome instances alive at once, per page load strategy
+BROWSER_MAX_PAGES = 200  # pages a driver serves before it is restarted
+BROWSER_HEADLESS = True
+SPACY_MODEL = "en_core_web_sm"
+PDF_TEXT_ONLY = (
+    True  # build PDF Docs on a blank pipeline instead of loading SPACY_MODEL
+)
+TESSDATA_PREFIX = r"C:\Program Files\Tesseract-OCR\tessdata"
+DISCOVERY_WORKERS = 4  # (organization, current/archived) listing crawls run at once
+DISCOVERY_BACKENDS = {
+    "Suncor Energy": "selenium",  # accordion is expanded client-side
+    "Pembina Pipeline": "http",
+    "Imperial Oil": "selenium",  # year filter and pager are client-side
+    "Enbridge": "http",
+    "Canadian Natural Resources": "selenium",  # links live in web components
+    "Shell Canada": "selenium",
+}  # "http" parses the server-rendered listing, "selenium" drives Chrome
+PDF_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # processes for PDF layout extraction
+PDF_TIMEOUT = 300  # seconds to wait for one PDF before its worker is restarted
+WRITE_BATCH_SIZE = 25  # rows written (and checkpointed) at a time by every reader
+RESUME_READS = True  # skip links an interrupted reader run already wrote
+RETRY_EXTRACTION = "selective"  # "selective" OCRs failing pages only, "ocr" every page
+PAGE_UNPRINTABLE_THRESHOLD = 0.05  # share of unprintable characters that fails a page
+EXTRACTION_CACHE_PATH = "output/cache/extractions.sqlite"
+EXTRACTION_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+PDF_ORGS = ["Suncor Energy", "Canadian Natural Resources"]
+QUALITY_SCORES_CSV = "output/content/quality_scores.csv"
+RETRY_QUEUE_CSV = "output/content/retry_queue.csv"
+RETRY_MAX_NON_ASCII_RATIO = 0.3  # above this the text layer is treated as garbled
+ARTICLE_FETCH_WORKERS = 16  # HTML articles downloaded at once
+ARTICLE_DEFAULT_HOST_CONCURRENCY = 4
+ARTICLE_HOST_CONCURRENCY = {"web.archive.org": 3}  # per-host caps for article pages
+ARTICLE_MAX_RETRIES = 3
+ARTICLE_RETRY_BACKOFF = 2  # seconds, doubled (with jitter) on every retry
+BROWSERLESS_ARCHIVE = (
+    True  # archived Imperial/Shell pages over HTTP, Chrome as fallback
+)
+FAST_HTML_PARSING = True  # lxml on the article subtree only, False for html.parser
+HTML_PARSE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+SNAPSHOT_DIR = "output/snapshots"  # raw HTML of every article page that was read
+SNAPSHOT_INDEX_PATH = "output/snapshots/index.sqlite"
+SNAPSHOT_FILE_MAX_BYTES = 256 * 1024 * 1024  # size at which a new segment is started
+# how the article text is pulled out of each site's HTML:
+#   parse_only  SoupStrainer arguments, the only elements lxml builds; "classes"
+#               keeps elements with any class fully matching one of the patterns
+#   scope       element every other selector is applied within
+#   title/blurb (selector, text mode) of the first lines of Content
+#   content_scope  first match that the content alternatives are applied within
+#   content     alternatives tried in order until one's container is found;
+#               "container" takes the first match, "containers" every match
+#               (omitted: the content scope itself), "when" must match the
+#               content scope, and "blocks" selects within the containers
+#               (omitted: the container's own text)
+#   skip        blocks that are left out
+#   lists       list blocks contribute one line per <li>
+# text modes: raw, strip, lines (newlines to spaces), collapse (all whitespace)
+HTML_RULES = {
+    "Pembina Pipeline": {
+        "parse_only": {"name": ["h1", "div"], "classes": ["large-text", "news-body"]},
+        "title": ("h1.large-text", "raw"),
+        # the first news body only: its own paragraphs, else those of its first
+        # inner div, else its whole text
+        "content_scope": "div.news-body",
+        "content": [
+            {"when": ":has(> p)", "blocks": ":scope > p"},
+            {"container": "div", "blocks": ":scope > p"},
+            {"text": "strip"},
+        ],
+        "text": "lines",
+        "lists": False,
+    },
+    "Imperial Oil": {
+        "parse_only": {"classes": [r".*module-details_title.*", "module_body"]},
+        "title": ("h3[class*='module-details_title']", "collapse"),
+        "content": [
+            {
+                "container": ".module_body div.q4default",
+                "blocks": ":scope > :is(p, ul, ol, div)",
+            },
+            {"container": ".module_body", "blocks": ":scope > :is(p, ul, ol, div)"},
+        ],
+        "skip": "table, .table-wrapper",
+    },
+    "Enbridge": {
+        "parse_only": {"name": "main"},
+        "title": ("main h1#startMainContent", "raw"),
+        "content": [{"container": "main > div", "blocks": ":scope > :is(p, ul, ol)"}],
+    },
+    "Shell Canada": {
+        "parse_only": {"id": "main"},
+        "scope": "#main",
+        "title": ("div[data-name='PageHeader'] h1", "strip"),
+        "blurb": ("div[data-name='PageHeader'] p", "strip"),
+        "content": [
+            {"containers": "div[data-name*='PromoSimple']", "blocks": "p, ul, ol, h3"}
+        ],
+        # archived pages predate the current site's components
+        "archived": {
+            "title": ("div.page-header__body h1", "strip"),
+            "blurb": ("p:not(.page-header__date)", "strip"),
+            "content": [
+                {
+                    "containers": "div.textimage.parbase.section[class*=basecomponent]",
+                    "blocks": "p, ul, ol, h3",
+                }
+            ],
+        },
+    },
+}
+PIPELINE_STATE_PATH = "output/cache/pipeline.json"  # fingerprints of finished stages
+PIPELINE_WORKERS = 3  # orgs run at once by stages that fan out per org
+DISCOVERY_TTL = 7 * 24 * 60 * 60  # seconds before listings are crawled again
@@ -0,0 +1,312 @@
+from config import (
+    ARTICLE_CSV_FIELDS,
+    CONTENT_BACKEND,
+    CONTENT_STORE_DIR,
+    WRITE_BATCH_SIZE,
+    RESUME_READS,
+)
+from row_store import row_store
+from canonical import CanonicalIndex, collection_links
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import argparse
+import csv
+import glob
+import os
+import threading
+import time
+import uuid
+
+CONTENT_CSVS = {
+    False: "output/content/raw_content.csv",
+    True: "output/content/raw_wayback_content.csv",
+}
+
+# the parquet store keeps one directory per (current/archived, organization);
+# every append is a new part file named by write time, so the newest row for a
+# link is always the last one read and nothing already written is rewritten
+
+
+def partition_dir(organization, is_archive):
+    return os.path.join(
+        CONTENT_STORE_DIR, "archived" if is_archive else "current", organization
+    )
+
+
+def partitions(is_archive, organization=None):
+    if organization is not None:
+        return [partition_dir(organization, is_archive)]
+    root = os.path.join(CONTENT_STORE_DIR, "archived" if is_archive else "current")
+    if not os.path.isdir(root):
+        return []
+    return [os.path.join(root, name) for name in sorted(os.listdir(root))]
+
+
+def part_files(partition):
+    return sorted(glob.glob(os.path.join(partition, "*.parquet")))
+
+
+def write_part(df, organization, is_archive):
+    partition = partition_dir(organization, is_archive)
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}")
+    table = pa.Table.from_pandas(
+        df[ARTICLE_CSV_FIELDS].astype(str), preserve_index=False
+    )
+    # written under a temporary name so readers never see half a file
+    pq.write_table(table, path + ".tmp")
+    os.replace(path + ".tmp", path + ".parquet")
+    return path + ".parquet"
+
+
+def append_parquet(new_rows, is_archive):
+    df = pd.DataFrame(new_rows, columns=ARTICLE_CSV_FIELDS)
+    for organization, rows in df.groupby("Organization", sort=False):
+        write_part(rows, organization, is_archive)
+
+
+def read_partition(partition, columns):
+    tables = [pq.read_table(path, columns=columns) for path in part_files(partition)]
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    return pa.concat_tables(tables).to_pandas()
+
+
+def read_parquet(is_archive, organization=None, columns=None):
+    # only the requested columns are decoded, so listing links never touches Content
+    columns = list(columns or ARTICLE_CSV_FIELDS)
+    if "Link" not in columns:
+        columns.append("Link")
+    frames = [
+        read_partition(partition, columns)
+        for partition in partitions(is_archive, organization)
+    ]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(frames, ignore_index=True)
+    return df.drop_duplicates(subset=["Link"], keep="last").reset_index(drop=True)
+
+
+def compact(is_archive=None, organization=None):
+    # folds every partition with several parts into one holding the latest rows
+    for archived in (False, True) if is_archive is None else (is_archive,):
+        for partition in partitions(archived, organization):
+            parts = part_files(partition)
+            if len(parts) < 2:
+                continue
+            df = read_partition(partition, ARTICLE_CSV_FIELDS)
+            df = df.drop_duplicates(subset=["Link"], keep="last")
+            write_part(df, os.path.basename(partition), archived)
+            for path in parts:
+                os.remove(path)
+            print(f"Compacted {len(parts)} parts into {len(df)} rows: {partition}")
+
+
+# orgs may be read in parallel, and both CSVs are shared by all of them
+csv_lock = threading.Lock()
+
+
+def append_csv(new_rows, is_archive):
+    article_csv = CONTENT_CSVS[is_archive]
+
+    with csv_lock, open(article_csv, "a", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=ARTICLE_CSV_FIELDS)
+        if os.stat(article_csv).st_size == 0:
+            writer.writeheader()
+        writer.writerows(new_rows)
+
+
+def merge_csv(new_rows, is_archive):
+    article_csv = CONTENT_CSVS[is_archive]
+    new_df = pd.DataFrame(new_rows)
+    with csv_lock:
+        if os.path.exists(article_csv):
+            old_df = pd.read_csv(article_csv)
+            combined_df = pd.concat([old_df, new_df], ignore_index=True)
+            final_df = combined_df.drop_duplicates(subset=["Link"], keep="last")
+        else:
+            final_df = new_df
+
+        final_df.to_csv(article_csv, index=False)
+    print(f"Successfully merged {len(new_rows)} rows into {article_csv}")
+
+
+seed_lock = threading.Lock()
+
+
+def store_empty(is_archive):
+    match CONTENT_BACKEND:
+        case "parquet":
+            return not any(
+                part_files(partition) for partition in partitions(is_archive)
+            )
+        case "sqlite":
+            return row_store.count("articles", is_archive) == 0
+        case _:
+            return False
+
+
+def seed_from_csv(is_archive):
+    # content read before the store existed is taken over once, before the
+    # first row is written to or read from it
+    with seed_lock:
+        if store_empty(is_archive) and os.path.exists(CONTENT_CSVS[is_archive]):
+            import_csv(is_archive)
+
+
+def append_rows(new_rows, is_archive):
+    seed_from_csv(is_archive)
+    match CONTENT_BACKEND:
+        case "parquet":
+            if new_rows:
+                append_parquet(new_rows, is_archive)
+        case "sqlite":
+            row_store.upsert("articles", new_rows, is_archive)
+        case _:
+            append_csv(new_rows, is_archive)
+
+
+def merge_rows(new_rows, is_archive):
+    seed_from_csv(is_archive)
+    match CONTENT_BACKEND:
+        case "parquet":
+            # a newer part already shadows the old rows, compaction drops them
+            if new_rows:
+                append_parquet(new_rows, is_archive)
+            print(f"Successfully merged {len(new_rows)} rows into the content store")
+        case "sqlite":
+            row_store.upsert("articles", new_rows, is_archive)
+            print(f"Successfully merged {len(new_rows)} rows into {row_store.path}")
+        case _:
+            merge_csv(new_rows, is_archive)
+
+
+def load_content(is_archive, organization=None, columns=None):
+    # the latest row for every link
+    seed_from_csv(is_archive)
+    match CONTENT_BACKEND:
+        case "parquet":
+            return read_parquet(is_archive, organization, columns)
+        case "sqlite":
+            return row_store.load("articles", is_archive, organization, columns)
+        case _:
+            article_csv = CONTENT_CSVS[is_archive]
+            if not os.path.exists(article_csv):
+                return pd.DataFrame(columns=columns or ARTICLE_CSV_FIELDS)
+            df = pd.read_csv(article_csv)
+            if organization is not None:
+                df = df[df["Organization"] == organization]
+            df = df.drop_duplicates(subset=["Link"], keep="last")
+            return df[columns or ARTICLE_CSV_FIELDS].reset_index(drop=True)
+
+
+def links_without_content(organization, is_archive):
+    # links the readers were given that have no content row in any backend
+    links = collection_links(is_archive)
+    links = links[links["Organization"] == organization]["Link"]
+    read = set(load_content(is_archive, organization, ["Link"])["Link"])
+    return [link for link in links if link not in read]
+
+
+def share_content(organization, links):
+    # copies the current collection's rows for links the archived one lists too
+    content = load_content(False, organization)
+    rows = content[content["Link"].isin(set(links))]
+    if not rows.empty:
+        merge_rows(rows.to_dict("records"), True)
+    return len(rows)
+
+
+class RowWriter:
+    # streams a reader's rows out in batches and checkpoints the links written,
+    # so an interrupted run picks up where it stopped. The checkpoint is cleared
+    # once the run finishes, so the next full run reads everything again.
+    def __init__(self, organization, is_archive, mode="read", merge=False):
+        self.organization = organization
+        self.is_archive = is_archive
+        self.mode = mode
+        self.merge = merge
+        self.rows = []
+        self.written = set()
+        self.variants = CanonicalIndex()
+
+    def pending(self, urls):
+        # one url per canonical article is returned, add() writes its content
+        # to every variant of it
+        done = set()
+        if RESUME_READS:
+            done = row_store.done_links(self.mode, self.organization, self.is_archive)
+            if done:
+                print(f"{self.organization}: resuming, {len(done)} links already done")
+        urls = [url for url in urls if url not in done]
+        for url in urls:
+            self.variants.add(url)
+        articles = CanonicalIndex(urls).representatives()
+        if len(articles) < len(urls):
+            print(
+                f"{self.organization}: {len(urls)} links are {len(articles)} articles"
+            )
+        return articles
+
+    def add(self, link, content):
+        for variant in self.variants.variants_of(link):
+            self.rows.append(
+                {"Organization": self.organization, "Link": variant, "Content": content}
+            )
+        if len(self.rows) >= WRITE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.merge:
+            merge_rows(self.rows, self.is_archive)
+        else:
+            append_rows(self.rows, self.is_archive)
+        links = [row["Link"] for row in self.rows]
+        row_store.mark_done(self.mode, self.organization, self.is_archive, links)
+        self.written.update(links)
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # rows finished before an error or Ctrl-C are still written
+        self.flush()
+        if exc_type is None:
+            row_store.clear_done(self.mode, self.organization, self.is_archive)
+        return False
+
+
+def export_csv(is_archive):
+    df = load_content(is_archive)
+    df.to_csv(CONTENT_CSVS[is_archive], index=False)
+    print(f"Exported {len(df)} rows to {CONTENT_CSVS[is_archive]}")
+
+
+def import_csv(is_archive):
+    df = pd.read_csv(CONTENT_CSVS[is_archive], dtype=str).fillna("")
+    match CONTENT_BACKEND:
+        case "sqlite":
+            row_store.upsert("articles", df.to_dict("records"), is_archive)
+        case _:
+            append_parquet(df.to_dict("records"), is_archive)
+    print(f"Imported {len(df)} rows from {CONTENT_CSVS[is_archive]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["compact", "export", "import"])
+    args = parser.parse_args()
+    for is_archive in (False, True):
+        match args.command:
+            case "compact":
+                compact(is_archive)
+            case "export":
+                export_csv(is_archive)
+            case "import":
+                if os.path.exists(CONTENT_CSVS[is_archive]):
+                    import_csv(is_archive)
@@ -0,0 +1,109 @@
+from config import (
+    PDF_DOWNLOAD_WORKERS,
+    PDF_DEFAULT_HOST_CONCURRENCY,
+    PDF_HOST_CONCURRENCY,
+)
+from wayback import raw_snapshot_url
+from pdf_store import manifest, new_object_file, commit_object
+from http_cache import validator_headers
+from http_session import make_session, HostSlots
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from tqdm import tqdm
+import hashlib
+import os
+
+PDF_MAGIC = b"%PDF-"
+
+retries = Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=[429, 500, 502, 503, 504],
+    respect_retry_after_header=True,
+)
+session = make_session(PDF_DOWNLOAD_WORKERS, retries)
+host_slots = HostSlots(PDF_HOST_CONCURRENCY, PDF_DEFAULT_HOST_CONCURRENCY)
+
+
+def download_pdf(url, organization, is_archive, refresh=False):
+    fetch_url = raw_snapshot_url(url)
+    entry = manifest.get(url) if refresh else None
+    if entry is None or entry["status"] != "done" or not os.path.exists(entry["path"]):
+        entry = None
+    headers = validator_headers(entry["etag"], entry["last_modified"]) if entry else {}
+    tmp_path = None
+    try:
+        with host_slots.slot(urlsplit(fetch_url).netloc):
+            with session.get(
+                fetch_url, headers=headers, stream=True, timeout=(10, 60)
+            ) as resp:
+                if resp.status_code == 304 and entry:
+                    fields = {
+                        field: entry[field]
+                        for field in ("sha256", "size", "path", "etag", "last_modified")
+                    }
+                    manifest.record(url, organization, is_archive, "done", **fields)
+                    return True
+                resp.raise_for_status()
+                fd, tmp_path = new_object_file()
+                digest = hashlib.sha256()
+                size = 0
+                with os.fdopen(fd, "wb") as f:
+                    head = b""
+                    for chunk in resp.iter_content(chunk_size=64 * 1024):
+                        if len(head) < 1024:
+                            head += chunk[: 1024 - len(head)]
+                        digest.update(chunk)
+                        size += len(chunk)
+                        f.write(chunk)
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+        # the PDF header may be preceded by junk bytes, but only within the first 1 KB
+        if PDF_MAGIC not in head:
+            raise ValueError("response is not a PDF")
+        sha256 = digest.hexdigest()
+        path = commit_object(tmp_path, sha256)
+        tmp_path = None
+        manifest.record(
+            url,
+            organization,
+            is_archive,
+            "done",
+            sha256=sha256,
+            size=size,
+            path=path,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        return True
+    except Exception as e:
+        print(f"Error downloading pdf: {url} ({e})")
+        if entry is None:
+            manifest.record(url, organization, is_archive, "failed")
+        # a failed revalidation keeps the copy that is already stored
+        return entry is not None
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def download_pdfs_http(
+    pdf_links,
+    organization,
+    is_archive,
+    refresh=False,
+    max_workers=PDF_DOWNLOAD_WORKERS,
+):
+    # returns the links that could not be fetched over plain HTTP
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            tqdm(
+                executor.map(
+                    lambda link: download_pdf(link, organization, is_archive, refresh),
+                    pdf_links,
+                ),
+                total=len(pdf_links),
+            )
+        )
+    return [link for link, ok in zip(pdf_links, results) if not ok]
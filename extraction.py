@@ -0,0 +1,201 @@
+from config import (
+    PDF_WORKERS,
+    PDF_TIMEOUT,
+    PAGE_UNPRINTABLE_THRESHOLD,
+)
+from models import get_layout, get_ocr_converter
+from extraction_cache import extraction_cache, pdf_hash
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+PAGE_SEPARATOR = "\n\n"
+
+worker_mode = None
+
+
+def score_page(text):
+    stripped = text.strip()
+    unprintable = sum(
+        1 for c in stripped if c == "\ufffd" or not (c.isprintable() or c.isspace())
+    )
+    return {
+        "glyphs": text.count("GLYPH"),
+        "unprintable_ratio": unprintable / len(stripped) if stripped else 0.0,
+        "empty": not stripped,
+    }
+
+
+def page_needs_ocr(score):
+    return (
+        score["glyphs"] > 0
+        or score["empty"]
+        or score["unprintable_ratio"] > PAGE_UNPRINTABLE_THRESHOLD
+    )
+
+
+def page_ranges(page_nos):
+    # consecutive bad pages are OCRed in a single conversion
+    ranges = []
+    for page_no in sorted(page_nos):
+        if ranges and ranges[-1][1] == page_no - 1:
+            ranges[-1][1] = page_no
+        else:
+            ranges.append([page_no, page_no])
+    return ranges
+
+
+def ocr_pages(pdf_loc, page_nos):
+    pages = {}
+    for start, end in page_ranges(page_nos):
+        document = (
+            get_ocr_converter().convert(pdf_loc, page_range=(start, end)).document
+        )
+        for item, _ in document.iterate_items():
+            text = getattr(item, "text", "")
+            if text and item.prov:
+                pages.setdefault(item.prov[0].page_no, []).append(text)
+    return {page_no: PAGE_SEPARATOR.join(texts) for page_no, texts in pages.items()}
+
+
+def page_texts(doc):
+    return {
+        page.page_no: PAGE_SEPARATOR.join(span.text for span in spans)
+        for page, spans in doc._.pages
+    }
+
+
+def extract_selective(pdf_loc):
+    # the text layer is kept wherever it is usable; only pages with broken font
+    # encodings, unprintable text or no text at all go through Tesseract
+    pages = page_texts(get_layout(force_ocr=False)(pdf_loc))
+    scores = {page_no: score_page(text) for page_no, text in pages.items()}
+    bad_pages = [page_no for page_no, score in scores.items() if page_needs_ocr(score)]
+    if bad_pages:
+        for page_no, text in ocr_pages(pdf_loc, bad_pages).items():
+            if page_no in pages and text.strip():
+                pages[page_no] = text
+                scores[page_no] = {**score_page(text), "ocr": True}
+    text = PAGE_SEPARATOR.join(
+        pages[page_no] for page_no in sorted(pages) if pages[page_no].strip()
+    )
+    return text, scores
+
+
+def extract_document(pdf_loc, mode=None):
+    # layout: text layer only, ocr: every page through Tesseract,
+    # selective: text layer with OCR spliced in for failing pages
+    # returns the document text and quality scores for each of its pages
+    mode = mode or worker_mode
+    if mode == "selective":
+        return extract_selective(pdf_loc)
+    doc = get_layout(force_ocr=mode == "ocr")(pdf_loc)
+    pages = page_texts(doc)
+    return doc.text, {page_no: score_page(text) for page_no, text in pages.items()}
+
+
+def init_worker(mode):
+    # every worker process builds its spaCy/docling pipelines once, not once per PDF
+    global worker_mode
+    worker_mode = mode
+    get_layout(force_ocr=mode == "ocr")
+    if mode == "selective":
+        get_ocr_converter()
+
+
+def stop_workers(executor):
+    # a hung or crashed worker cannot be cancelled, only terminated
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_isolated(pdf_loc, mode, timeout):
+    executor = ProcessPoolExecutor(
+        max_workers=1, initializer=init_worker, initargs=(mode,)
+    )
+    try:
+        return executor.submit(extract_document, pdf_loc).result(timeout=timeout), None
+    except TimeoutError:
+        return None, "extraction timed out"
+    except Exception as e:
+        return None, e
+    finally:
+        stop_workers(executor)
+
+
+def run_extraction(pdf_locs, mode, max_workers, timeout):
+    if max_workers <= 1:
+        for pdf_loc in pdf_locs:
+            try:
+                yield pdf_loc, extract_document(pdf_loc, mode), None
+            except Exception as e:
+                yield pdf_loc, None, e
+        return
+
+    pending = list(pdf_locs)
+    while pending:
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=init_worker, initargs=(mode,)
+        )
+        futures = [
+            (pdf_loc, executor.submit(extract_document, pdf_loc)) for pdf_loc in pending
+        ]
+        pending = []
+        for i, (pdf_loc, future) in enumerate(futures):
+            try:
+                yield pdf_loc, future.result(timeout=timeout), None
+                continue
+            except TimeoutError:
+                yield pdf_loc, None, "extraction timed out"
+            except BrokenProcessPool:
+                # any document in flight may have killed the pool, so this one
+                # is retried alone before it is blamed
+                stop_workers(executor)
+                result, error = extract_isolated(pdf_loc, mode, timeout)
+                yield pdf_loc, result, error
+            except Exception as e:
+                yield pdf_loc, None, e
+                continue
+            # restart the pool and resubmit everything after this document
+            stop_workers(executor)
+            pending = [pdf_loc for pdf_loc, _ in futures[i + 1 :]]
+            break
+        else:
+            executor.shutdown()
+
+
+def extract_pdfs(
+    pdf_locs,
+    mode="layout",
+    max_workers=PDF_WORKERS,
+    timeout=PDF_TIMEOUT,
+    use_cache=True,
+):
+    # yields (pdf_loc, text, error) in the order of pdf_locs; a failing document
+    # only produces an error entry and never stops the rest of the batch.
+    # Unchanged PDFs already extracted with the same settings come from the cache.
+    hashes = []
+    cached = {}
+    for i, pdf_loc in enumerate(pdf_locs):
+        try:
+            sha256 = pdf_hash(pdf_loc) if use_cache else None
+        except OSError:
+            sha256 = None
+        hashes.append(sha256)
+        entry = extraction_cache.get(sha256, mode) if sha256 else None
+        if entry is not None:
+            cached[i] = entry[0]
+    misses = [pdf_loc for i, pdf_loc in enumerate(pdf_locs) if i not in cached]
+    results = run_extraction(misses, mode, max_workers, timeout)
+    for i, pdf_loc in enumerate(pdf_locs):
+        if i in cached:
+            yield pdf_loc, cached[i], None
+            continue
+        _, result, error = next(results)
+        if error is not None:
+            yield pdf_loc, None, error
+            continue
+        text, pages = result
+        if hashes[i]:
+            extraction_cache.put(hashes[i], mode, text, pages)
+        yield pdf_loc, text, None
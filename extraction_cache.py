@@ -0,0 +1,209 @@
+from config import (
+    EXTRACTION_CACHE_PATH,
+    EXTRACTION_CACHE_MAX_BYTES,
+    PDF_OBJECT_DIR,
+    PAGE_UNPRINTABLE_THRESHOLD,
+    SPACY_MODEL,
+)
+from pdf_store import hash_file
+from functools import lru_cache
+from importlib import metadata
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# settings that change what an extractor produces for the same PDF
+OCR_OPTIONS = {
+    "layout": "",
+    "ocr": "tesseract;force_full_page_ocr=True;do_table_structure=True",
+    "selective": f"tesseract;pages;unprintable_threshold={PAGE_UNPRINTABLE_THRESHOLD}",
+}
+
+
+@lru_cache(maxsize=None)
+def model_version():
+    versions = []
+    for package in ("docling", "spacy-layout", SPACY_MODEL):
+        try:
+            versions.append(f"{package}=={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}==?")
+    return ";".join(versions)
+
+
+def pdf_hash(pdf_loc):
+    # PDFs in the content-addressed store are already named by their sha256
+    name = os.path.basename(pdf_loc)
+    if os.path.dirname(os.path.dirname(os.path.abspath(pdf_loc))) == os.path.abspath(
+        PDF_OBJECT_DIR
+    ) and re.fullmatch(r"[0-9a-f]{64}\.pdf", name):
+        return name[:-4]
+    return hash_file(pdf_loc)
+
+
+class ExtractionCache:
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    sha256 TEXT NOT NULL,
+                    extractor TEXT NOT NULL,
+                    ocr_options TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    pages TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (sha256, extractor, ocr_options, model_version)
+                )
+                """)
+            # lookups from every run, so hit rates can be inspected afterwards
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+                """)
+        return self.conn
+
+    @staticmethod
+    def count(conn, name):
+        conn.execute(
+            "INSERT INTO counters VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value=value+1",
+            (name,),
+        )
+
+    @staticmethod
+    def key(sha256, extractor):
+        return (sha256, extractor, OCR_OPTIONS[extractor], model_version())
+
+    def get(self, sha256, extractor):
+        key = self.key(sha256, extractor)
+        with self.lock:
+            conn = self.connect()
+            row = conn.execute(
+                "SELECT text, pages FROM extractions WHERE sha256=? AND extractor=? AND ocr_options=? AND model_version=?",
+                key,
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                self.count(conn, "misses")
+                conn.commit()
+                return None
+            self.hits += 1
+            self.count(conn, "hits")
+            conn.execute(
+                "UPDATE extractions SET hits=hits+1, accessed_at=? WHERE sha256=? AND extractor=? AND ocr_options=? AND model_version=?",
+                (time.time(), *key),
+            )
+            conn.commit()
+        return row[0], json.loads(row[1])
+
+    def put(self, sha256, extractor, text, pages):
+        pages = json.dumps(pages)
+        now = time.time()
+        with self.lock:
+            conn = self.connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (
+                    *self.key(sha256, extractor),
+                    text,
+                    pages,
+                    len(text) + len(pages),
+                    now,
+                    now,
+                ),
+            )
+            self.evict(conn)
+            conn.commit()
+
+    def evict(self, conn):
+        (total,) = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM extractions"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT rowid, size FROM extractions ORDER BY accessed_at"
+        ).fetchall()
+        stale = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((rowid,))
+            total -= size
+        conn.executemany("DELETE FROM extractions WHERE rowid=?", stale)
+
+    def stats(self):
+        with self.lock:
+            conn = self.connect()
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions"
+            ).fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters"))
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else None,
+            "session_hits": self.hits,
+            "session_misses": self.misses,
+        }
+
+    def entries_for(self, pdf_loc):
+        with self.lock:
+            rows = (
+                self.connect()
+                .execute(
+                    "SELECT extractor, ocr_options, model_version, size, hits, created_at, pages FROM extractions WHERE sha256=?",
+                    (pdf_hash(pdf_loc),),
+                )
+                .fetchall()
+            )
+        return [
+            {
+                "extractor": extractor,
+                "ocr_options": ocr_options,
+                "model_version": version,
+                "bytes": size,
+                "hits": hits,
+                "created_at": created_at,
+                "pages": json.loads(pages),
+            }
+            for extractor, ocr_options, version, size, hits, created_at, pages in rows
+        ]
+
+
+extraction_cache = ExtractionCache(EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_MAX_BYTES)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["stats", "show"])
+    parser.add_argument("pdf", nargs="?")
+    args = parser.parse_args()
+    match args.command:
+        case "stats":
+            print(json.dumps(extraction_cache.stats(), indent=2))
+        case "show":
+            print(json.dumps(extraction_cache.entries_for(args.pdf), indent=2))
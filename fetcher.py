@@ -1,396 +1,442 @@
 from config import (
     URLS,
-    WAYBACK_ENDPOINT,
     BILL_C59_ROYAL_ASSENT_DATE,
-    LINK_CSV_FIELDS,
-    WAYBACK_PREFIX,
     WAYBACK_ORGS,
+    WAYBACK_INDEX_PREFIXES,
+    INCREMENTAL_REFRESH,
+    DISCOVERY_WORKERS,
+    DISCOVERY_BACKENDS,
 )
-import requests
+from browser_pool import checkout, shutdown as shutdown_browsers
+from downloader import download_pdfs_http
+from pdf_store import manifest, adopt_saved_pdfs, saved_pdf_dir, share_variants
+from canonical import CanonicalIndex, original_url
+from row_store import append_links, load_links
+from wayback import (
+    fetch_wayback_urls,
+    fetch_wayback_index,
+    SnapshotIndex,
+    raw_snapshot_url,
+)
+from http_session import make_session
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import time
 import os
-import random
 import pandas as pd
 from tqdm import tqdm
 import os, os.path
 
-driver = webdriver.Chrome()
-driver.implicitly_wait(5)
 date = datetime.now()
-session = requests.Session()
-session.headers.update(
-    {
-        "User-Agent": "Mozilla/5.0 (compatible; ResearchBot/1.0; +https://example.org/contact)"
-    }
-)
+session = make_session()
 
 
-def fetch_wayback_url(url, max_retries=5, to=None, limit=-1):
-    for attempt in range(max_retries):
-        try:
-            payload = {
-                "url": url,
-                "output": "json",
-                "to": to,
-                "limit": limit,
+def fetch_suncor_article_urls(url, is_archive):
+    with checkout() as driver:
+        driver.get(url)
+        link_elems = driver.find_elements(By.CLASS_NAME, "download-embed__link")
+        show_all_btn = driver.find_element(By.CLASS_NAME, "accordion-group__button")
+        driver.execute_script("arguments[0].scrollIntoView(true);", show_all_btn)
+        driver.execute_script("arguments[0].click();", show_all_btn)
+        accordion_group = driver.find_element(By.CLASS_NAME, "accordion-group__items")
+        link_elems.extend(accordion_group.find_elements(By.TAG_NAME, "a"))
+        new_rows = [
+            {
+                "Organization": "Suncor Energy",
+                "Link": link_elem.get_attribute("href"),
+                "Date Scraped": date.strftime("%m/%d/%Y"),
+                "Type": "pdf",
             }
-            res = session.get(WAYBACK_ENDPOINT, params=payload, timeout=25)
-            res.raise_for_status()
-
-            if res.status_code == 200:
-                data = res.json()
-                header = data[0]
-                values = data[1]
-                record = dict(zip(header, values))
-                return f"{WAYBACK_PREFIX}/{record['timestamp']}/{record['original']}"
-            elif res.status_code == 429:
-                wait = 2**attempt + random.uniform(0, 3)
-                print(f"Rate limited (429). Waiting {wait:.1f}s before retrying...")
-                time.sleep(wait)
-            else:
-                print(f"Unexpected {res.status_code}: {res.text}")
-                break
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
-            time.sleep(2)
+            for link_elem in link_elems
+        ]
+    append_links(new_rows, is_archive)
 
 
-def append_csv(new_rows, is_archive):
-    link_csv = (
-        "output/links/wayback_article_links.csv"
-        if is_archive
-        else "output/links/article_links.csv"
-    )
+def get_listing_soup(url):
+    # Wayback's raw snapshot keeps the original hrefs, which is what the browser
+    # reports for archived pages once the playback scripts have run
+    resp = session.get(raw_snapshot_url(url), timeout=25)
+    resp.raise_for_status()
+    return original_url(url), BeautifulSoup(resp.text, features="html.parser")
 
-    with open(link_csv, "a", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=LINK_CSV_FIELDS)
-        if os.stat(link_csv).st_size == 0:
-            writer.writeheader()
-        writer.writerows(new_rows)
 
-
-def fetch_suncor_article_urls(url, is_archive):
-    driver.get(url)
-    link_elems = driver.find_elements(By.CLASS_NAME, "download-embed__link")
-    show_all_btn = driver.find_element(By.CLASS_NAME, "accordion-group__button")
-    driver.execute_script("arguments[0].scrollIntoView(true);", show_all_btn)
-    driver.execute_script("arguments[0].click();", show_all_btn)
-    accordion_group = driver.find_element(By.CLASS_NAME, "accordion-group__items")
-    link_elems.extend(accordion_group.find_elements(By.TAG_NAME, "a"))
-    new_rows = [
-        {
-            "Organization": "Suncor Energy",
-            "Link": link_elem.get_attribute("href"),
-            "Date Scraped": date.strftime("%m/%d/%Y"),
-            "Type": "pdf",
-        }
-        for link_elem in link_elems
-    ]
-    append_csv(new_rows, is_archive)
+def select_hrefs(base_url, soup, selector):
+    return [urljoin(base_url, elem["href"]) for elem in soup.select(selector)]
 
 
 def fetch_pembina_article_urls(url, is_archive):
-    driver.get(url)
-    link_elems = driver.find_elements(By.CLASS_NAME, "news-item")
+    if DISCOVERY_BACKENDS["Pembina Pipeline"] == "http":
+        base_url, soup = get_listing_soup(url)
+        links = select_hrefs(base_url, soup, ".news-item[href]")
+    else:
+        with checkout() as driver:
+            driver.get(url)
+            link_elems = driver.find_elements(By.CLASS_NAME, "news-item")
+            links = [link_elem.get_attribute("href") for link_elem in link_elems]
     new_rows = [
         {
             "Organization": "Pembina Pipeline",
-            "Link": link_elem.get_attribute("href"),
+            "Link": link,
             "Date Scraped": date.strftime("%m/%d/%Y"),
             "Type": "html",
         }
-        for link_elem in link_elems
+        for link in links
     ]
-    append_csv(new_rows, is_archive)
+    append_links(new_rows, is_archive)
 
 
 def fetch_imperial_article_urls(url, is_archive):
-    driver.get(url)
-    if not is_archive:
-        close_popup_btn = driver.find_element(By.CLASS_NAME, "fancybox-close-small")
-        close_popup_btn.click()
-    year_filter = driver.find_element(By.ID, "newsYear")
-    year_options = year_filter.find_elements(By.TAG_NAME, "option")
-    new_rows = []
-    for year in year_options:
-        driver.execute_script(
-            """
-        var select = arguments[0];
-        var value = arguments[1];
-        select.value = value;
-        select.dispatchEvent(new Event('change'));
-        """,
-            year_filter,
-            year.get_attribute("value"),
-        )
-        time.sleep(2)
-        while True:
-            try:
-                next_page_btn = driver.find_element(By.CLASS_NAME, "pager-next")
-                if "pager-disabled" in next_page_btn.get_attribute("class"):
-                    break
-                driver.execute_script(
-                    "arguments[0].scrollIntoView(true);", next_page_btn
+    with checkout() as driver:
+        driver.get(url)
+        if not is_archive:
+            close_popup_btn = driver.find_element(By.CLASS_NAME, "fancybox-close-small")
+            close_popup_btn.click()
+        year_filter = driver.find_element(By.ID, "newsYear")
+        year_options = year_filter.find_elements(By.TAG_NAME, "option")
+        new_rows = []
+        for year in year_options:
+            driver.execute_script(
+                """
+            var select = arguments[0];
+            var value = arguments[1];
+            select.value = value;
+            select.dispatchEvent(new Event('change'));
+            """,
+                year_filter,
+                year.get_attribute("value"),
+            )
+            time.sleep(2)
+            while True:
+                try:
+                    next_page_btn = driver.find_element(By.CLASS_NAME, "pager-next")
+                    if "pager-disabled" in next_page_btn.get_attribute("class"):
+                        break
+                    driver.execute_script(
+                        "arguments[0].scrollIntoView(true);", next_page_btn
+                    )
+                    driver.execute_script("arguments[0].click()", next_page_btn)
+                except Exception as ex:
+                    print(f"An error occurred while trying to scrape {url}: {ex.args}")
+            english_links = driver.find_elements(By.CSS_SELECTOR, "div.module_item.en")
+            year_link_elems = []
+            for english_link in english_links:
+                year_link_elems.append(
+                    english_link.find_element(By.CLASS_NAME, "module_headline-link")
                 )
-                driver.execute_script("arguments[0].click()", next_page_btn)
-            except Exception as ex:
-                print(f"An error occurred while trying to scrape {url}: {ex.args}")
-        english_links = driver.find_elements(By.CSS_SELECTOR, "div.module_item.en")
-        year_link_elems = []
-        for english_link in english_links:
-            year_link_elems.append(
-                english_link.find_element(By.CLASS_NAME, "module_headline-link")
+            new_rows.extend(
+                [
+                    {
+                        "Organization": "Imperial Oil",
+                        "Link": link_elem.get_attribute("href"),
+                        "Date Scraped": date.strftime("%m/%d/%Y"),
+                        "Type": "html",
+                    }
+                    for link_elem in year_link_elems
+                ]
             )
-        new_rows.extend(
-            [
-                {
-                    "Organization": "Imperial Oil",
-                    "Link": link_elem.get_attribute("href"),
-                    "Date Scraped": date.strftime("%m/%d/%Y"),
-                    "Type": "html",
-                }
-                for link_elem in year_link_elems
-            ]
-        )
-    append_csv(new_rows, is_archive)
+    append_links(new_rows, is_archive)
+
+
+def read_enbridge_listing(url, is_archive, is_root):
+    if DISCOVERY_BACKENDS["Enbridge"] == "http":
+        base_url, soup = get_listing_soup(url)
+        links = select_hrefs(base_url, soup, ".news-items a[href]")
+        year_urls = select_hrefs(base_url, soup, ".year-tabs a[href]")
+        return links, year_urls[1:]
+    with checkout() as driver:
+        driver.get(url)
+        if not is_archive and is_root:
+            try:
+                shadow_host = WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.ID, "usercentrics-root"))
+                )
+                shadow_root = driver.execute_script(
+                    "return arguments[0].shadowRoot", shadow_host
+                )
+
+                accept_cookies = shadow_root.find_element(
+                    By.CSS_SELECTOR, "button[data-testid='uc-accept-all-button']"
+                )
+                accept_cookies.click()
+            except:
+                print(
+                    f"An error occurred while trying to accept site cookies for {url}"
+                )
+        news_items_div = driver.find_element(By.CLASS_NAME, "news-items")
+        link_elems = news_items_div.find_elements(By.TAG_NAME, "a")
+        links = [link_elem.get_attribute("href") for link_elem in link_elems]
+        year_urls = []
+        if is_root:
+            year_tab_div = driver.find_element(By.CLASS_NAME, "year-tabs")
+            year_tabs = year_tab_div.find_elements(By.TAG_NAME, "a")
+            year_urls = [year_tab.get_attribute("href") for year_tab in year_tabs]
+            year_urls = year_urls[1:]
+    return links, year_urls
 
 
 def fetch_enbridge_article_urls(url, is_archive, is_root):
-    driver.get(url)
-    if not is_archive and is_root:
-        try:
-            shadow_host = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "usercentrics-root"))
-            )
-            shadow_root = driver.execute_script(
-                "return arguments[0].shadowRoot", shadow_host
-            )
-
-            accept_cookies = shadow_root.find_element(
-                By.CSS_SELECTOR, "button[data-testid='uc-accept-all-button']"
-            )
-            accept_cookies.click()
-        except:
-            print(f"An error occurred while trying to accept site cookies for {url}")
-    news_items_div = driver.find_element(By.CLASS_NAME, "news-items")
-    link_elems = news_items_div.find_elements(By.TAG_NAME, "a")
+    links, year_urls = read_enbridge_listing(url, is_archive, is_root)
     new_rows = [
         {
             "Organization": "Enbridge",
-            "Link": link_elem.get_attribute("href"),
+            "Link": link,
             "Date Scraped": date.strftime("%m/%d/%Y"),
             "Type": "html",
         }
-        for link_elem in link_elems
+        for link in links
     ]
     if is_root:
-        year_tab_div = driver.find_element(By.CLASS_NAME, "year-tabs")
-        year_tabs = year_tab_div.find_elements(By.TAG_NAME, "a")
-        year_urls = [year_tab.get_attribute("href") for year_tab in year_tabs]
-        year_urls = year_urls[1:]
         if is_archive:
-            year_urls = [
-                fetch_wayback_url(year_url, to=BILL_C59_ROYAL_ASSENT_DATE)
-                for year_url in year_urls
-            ]
+            year_urls = fetch_wayback_urls(year_urls, to=BILL_C59_ROYAL_ASSENT_DATE)
         new_rows.extend(
             row
             for year_url in year_urls
             for row in fetch_enbridge_article_urls(year_url, is_archive, False)
         )
-        append_csv(new_rows, is_archive)
+        append_links(new_rows, is_archive)
     return new_rows
 
 
 def fetch_cnrl_article_urls(url, is_archive):
-    driver.get(url)
-    accept_cookies_btn = driver.find_element(By.CLASS_NAME, "cky-btn-accept")
-    accept_cookies_btn.click()
-    container_div = driver.find_element(By.CLASS_NAME, "wp-block-nf-cnrl-tabs")
-    new_rows = []
-    link_elems = container_div.find_elements(By.TAG_NAME, "cnrl-news-release-card")
-    new_rows.extend(
-        [
-            {
-                "Organization": "Canadian Natural Resources",
-                "Link": f"https://www.cnrl.com{link_elem.get_attribute('link')}",
-                "Date Scraped": date.strftime("%m/%d/%Y"),
-                "Type": "pdf",
-            }
-            for link_elem in link_elems
-        ]
-    )
-    append_csv(new_rows, is_archive)
+    with checkout() as driver:
+        driver.get(url)
+        accept_cookies_btn = driver.find_element(By.CLASS_NAME, "cky-btn-accept")
+        accept_cookies_btn.click()
+        container_div = driver.find_element(By.CLASS_NAME, "wp-block-nf-cnrl-tabs")
+        new_rows = []
+        link_elems = container_div.find_elements(By.TAG_NAME, "cnrl-news-release-card")
+        new_rows.extend(
+            [
+                {
+                    "Organization": "Canadian Natural Resources",
+                    "Link": f"https://www.cnrl.com{link_elem.get_attribute('link')}",
+                    "Date Scraped": date.strftime("%m/%d/%Y"),
+                    "Type": "pdf",
+                }
+                for link_elem in link_elems
+            ]
+        )
+    append_links(new_rows, is_archive)
 
 
 def fetch_shell_article_urls(url, is_archive, is_root):
-    driver.get(url)
-    if is_archive:
-        body_container_div = driver.find_element(By.CLASS_NAME, "promo-list__base")
-        item_container_divs = body_container_div.find_elements(
-            By.CLASS_NAME, "promo-list__text"
-        )
-        link_elems = [
-            item_container_div.find_element(By.TAG_NAME, "a")
-            for item_container_div in item_container_divs
-        ]
-        new_rows = [
-            {
-                "Organization": "Shell Canada",
-                "Link": link_elem.get_attribute("href"),
-                "Date Scraped": date.strftime("%m/%d/%Y"),
-                "Type": "html",
-            }
-            for link_elem in link_elems
-        ]
-        if is_root:
-            expand_archive = driver.find_element(
-                By.CLASS_NAME, "expandable-list__item "
+    with checkout() as driver:
+        driver.get(url)
+        if is_archive:
+            body_container_div = driver.find_element(By.CLASS_NAME, "promo-list__base")
+            item_container_divs = body_container_div.find_elements(
+                By.CLASS_NAME, "promo-list__text"
             )
-            expand_archive.click()
-            container_div = driver.find_element(
-                By.CLASS_NAME, "expandable-list__item-body"
+            link_elems = [
+                item_container_div.find_element(By.TAG_NAME, "a")
+                for item_container_div in item_container_divs
+            ]
+            new_rows = [
+                {
+                    "Organization": "Shell Canada",
+                    "Link": link_elem.get_attribute("href"),
+                    "Date Scraped": date.strftime("%m/%d/%Y"),
+                    "Type": "html",
+                }
+                for link_elem in link_elems
+            ]
+            if is_root:
+                expand_archive = driver.find_element(
+                    By.CLASS_NAME, "expandable-list__item "
+                )
+                expand_archive.click()
+                container_div = driver.find_element(
+                    By.CLASS_NAME, "expandable-list__item-body"
+                )
+                archive_link_elems = container_div.find_elements(By.TAG_NAME, "a")
+                archive_urls = [
+                    archive_link_elem.get_attribute("href")
+                    for archive_link_elem in archive_link_elems
+                ]
+        else:
+            container_divs = driver.find_elements(
+                By.CSS_SELECTOR, "div[data-name='PressRelease']"
             )
-            archive_link_elems = container_div.find_elements(By.TAG_NAME, "a")
-            archive_urls = [
-                archive_link_elem.get_attribute("href")
-                for archive_link_elem in archive_link_elems
+            link_elems = [
+                container_div.find_element(By.TAG_NAME, "a")
+                for container_div in container_divs
             ]
-            archive_urls = [
-                fetch_wayback_url(archive_url) for archive_url in archive_urls
+            new_rows = [
+                {
+                    "Organization": "Shell Canada",
+                    "Link": link_elem.get_attribute("href"),
+                    "Date Scraped": date.strftime("%m/%d/%Y"),
+                    "Type": "html",
+                }
+                for link_elem in link_elems
             ]
+    if is_archive:
+        # the driver goes back to the pool before the archive pages check out their own
+        if is_root:
+            archive_urls = fetch_wayback_urls(archive_urls)
             new_rows.extend(
                 row
                 for archive_url in archive_urls
                 for row in fetch_shell_article_urls(archive_url, is_archive, False)
             )
-            append_csv(new_rows, is_archive)
+            append_links(new_rows, is_archive)
         return new_rows
     else:
-        container_divs = driver.find_elements(
-            By.CSS_SELECTOR, "div[data-name='PressRelease']"
-        )
-        link_elems = [
-            container_div.find_element(By.TAG_NAME, "a")
-            for container_div in container_divs
-        ]
-        new_rows = [
-            {
-                "Organization": "Shell Canada",
-                "Link": link_elem.get_attribute("href"),
-                "Date Scraped": date.strftime("%m/%d/%Y"),
-                "Type": "html",
-            }
-            for link_elem in link_elems
-        ]
-        append_csv(new_rows, is_archive)
-
-
-def fetch_urls():
-    for org, url in URLS.items():
-        URLS[org]["archived"] = fetch_wayback_url(url["current"])
-
-    for org, url in URLS.items():
-        match org:
-            case "Suncor Energy":
-                fetch_suncor_article_urls(url["current"], False)
-                fetch_suncor_article_urls(url["archived"], True)
-                print("Fetched Suncor Energy URLs!")
-            case "Pembina Pipeline":
-                fetch_pembina_article_urls(url["current"], False)
-                fetch_pembina_article_urls(url["archived"], True)
-                print("Fetched Pembina Pipeline URLs!")
-            case "Imperial Oil":
-                fetch_imperial_article_urls(url["current"], False)
-                fetch_imperial_article_urls(url["archived"], True)
-                print("Fetched Imperial Oil URLs!")
-            case "Enbridge":
-                fetch_enbridge_article_urls(url["current"], False, True)
-                fetch_enbridge_article_urls(url["archived"], True, True)
-                print("Fetched Enbridge URLs!")
-            case "Canadian Natural Resources":
-                fetch_cnrl_article_urls(url["current"], False)
-                fetch_cnrl_article_urls(url["archived"], True)
-                print("Fetched Canadian Natural Resources URLs!")
-            case "Shell Canada":
-                fetch_shell_article_urls(url["current"], False, True)
-                fetch_shell_article_urls(url["archived"], True, True)
-                print("Fetched Shell Canada URLs!")
-            case _:
-                print(f"URL fetching for {org} not implemented yet!")
+        append_links(new_rows, is_archive)
+
+
+def discovery_jobs(org, url):
+    match org:
+        case "Suncor Energy":
+            return [
+                (fetch_suncor_article_urls, (url["current"], False)),
+                (fetch_suncor_article_urls, (url["archived"], True)),
+            ]
+        case "Pembina Pipeline":
+            return [
+                (fetch_pembina_article_urls, (url["current"], False)),
+                (fetch_pembina_article_urls, (url["archived"], True)),
+            ]
+        case "Imperial Oil":
+            return [
+                (fetch_imperial_article_urls, (url["current"], False)),
+                (fetch_imperial_article_urls, (url["archived"], True)),
+            ]
+        case "Enbridge":
+            return [
+                (fetch_enbridge_article_urls, (url["current"], False, True)),
+                (fetch_enbridge_article_urls, (url["archived"], True, True)),
+            ]
+        case "Canadian Natural Resources":
+            return [
+                (fetch_cnrl_article_urls, (url["current"], False)),
+                (fetch_cnrl_article_urls, (url["archived"], True)),
+            ]
+        case "Shell Canada":
+            return [
+                (fetch_shell_article_urls, (url["current"], False, True)),
+                (fetch_shell_article_urls, (url["archived"], True, True)),
+            ]
+        case _:
+            print(f"URL fetching for {org} not implemented yet!")
+            return []
+
+
+def fetch_urls(max_workers=DISCOVERY_WORKERS, orgs=None):
+    urls = {org: url for org, url in URLS.items() if orgs is None or org in orgs}
+    archived_roots = fetch_wayback_urls([url["current"] for url in urls.values()])
+    for org, archived_root in zip(urls, archived_roots):
+        urls[org]["archived"] = archived_root
+
+    # each job checks out its own browser from the pool, rows meet in append_links.
+    # Returns the (organization, current/archived) crawls that failed.
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(func, *args): (org, args[1])
+            for org, url in urls.items()
+            for func, args in discovery_jobs(org, url)
+        }
+        for future in as_completed(futures):
+            org, is_archive = futures[future]
+            kind = "archived" if is_archive else "current"
+            try:
+                future.result()
+                print(f"Fetched {org} ({kind}) URLs!")
+            except Exception as e:
+                print(f"An error occurred while fetching {org} ({kind}) URLs: {e}")
+                failed.append((org, kind))
 
     print("Fetched all article URLs!")
+    shutdown_browsers()
+    return failed
+
+
+def download_pdfs_with_chrome(pdf_links, download_dir, is_archive):
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_experimental_option(
+        "prefs",
+        {
+            "download.default_directory": download_dir,
+            "download.prompt_for_download": False,
+            "plugins.always_open_pdf_externally": True,
+            "profile.default_content_setting_values.automatic_downloads": 1,
+            "safebrowsing.enabled": False,
+            "safebrowsing.disable_extension_blacklist": True,
+        },
+    )
+    chrome_options.add_argument("--allow-running-insecure-content")
+    chrome_options.add_argument("--ignore-certificate-errors")
+    chrome_options.add_argument("--disable-web-security")
+    chrome_options.add_argument(
+        "--unsafely-treat-insecure-origin-as-secure=http://archive.org,http://wayback.com"
+    )
+    driver = webdriver.Chrome(options=chrome_options)
+    for pdf_link in tqdm(pdf_links):
+        if is_archive:
+            try:
+                driver.get(pdf_link)
+                iframe = driver.find_element(By.ID, "playback")
+                driver.switch_to.frame(iframe)
+                save_btn = driver.find_element(By.ID, "open-button")
+                save_btn.click()
+                time.sleep(2)
+            except:
+                print(f"Error downloading pdf: {pdf_link}")
+            finally:
+                driver.switch_to.default_content()
+        else:
+            driver.get(pdf_link)
+            time.sleep(1)
     driver.quit()
 
 
-def download_pdfs(links, is_archive):
+def download_pdfs(links, is_archive, refresh=INCREMENTAL_REFRESH):
     pdf_links_df = links[links["Type"] == "pdf"]
     pdf_orgs = list(pdf_links_df["Organization"].unique())
     for org in pdf_orgs:
-        dir_path = (
-            f"output\pdfs\{org}\\archived"
-            if is_archive
-            else f"output\pdfs\{org}\current"
-        )
-        download_dir = os.path.abspath(dir_path)
+        download_dir = os.path.abspath(saved_pdf_dir(org, is_archive))
         os.makedirs(download_dir, exist_ok=True)
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_experimental_option(
-            "prefs",
-            {
-                "download.default_directory": download_dir,
-                "download.prompt_for_download": False,
-                "plugins.always_open_pdf_externally": True,
-                "profile.default_content_setting_values.automatic_downloads": 1,
-                "safebrowsing.enabled": False,
-                "safebrowsing.disable_extension_blacklist": True,
-            },
-        )
-        chrome_options.add_argument("--allow-running-insecure-content")
-        chrome_options.add_argument("--ignore-certificate-errors")
-        chrome_options.add_argument("--disable-web-security")
-        chrome_options.add_argument(
-            "--unsafely-treat-insecure-origin-as-secure=http://archive.org,http://wayback.com"
-        )
-        driver = webdriver.Chrome(options=chrome_options)
         pdf_links = pdf_links_df[pdf_links_df["Organization"] == org]["Link"].to_list()
 
-        start = (
-            len(
-                [
-                    entry
-                    for entry in os.listdir(f".\{dir_path}")
-                    if os.path.isfile(os.path.join(dir_path, entry))
-                ]
-            )
-            - 1
-        )
-        for pdf_link in tqdm(pdf_links[start:]):
-            if is_archive:
-                try:
-                    driver.get(pdf_link)
-                    iframe = driver.find_element(By.ID, "playback")
-                    driver.switch_to.frame(iframe)
-                    save_btn = driver.find_element(By.ID, "open-button")
-                    save_btn.click()
-                    time.sleep(2)
-                except:
-                    print(f"Error downloading pdf: {pdf_link}")
-                finally:
-                    driver.switch_to.default_content()
-            else:
-                driver.get(pdf_link)
-                time.sleep(1)
-        driver.quit()
+        done_links = manifest.done_links(org)
+        pending_links = [link for link in pdf_links if link not in done_links]
+        adopted = adopt_saved_pdfs(pending_links, org, is_archive, download_dir)
+        shared = share_variants(pending_links, org, is_archive)
+        if adopted or shared:
+            done_links = manifest.done_links(org)
+            pending_links = [link for link in pdf_links if link not in done_links]
+        print(f"{org}: {len(pdf_links) - len(pending_links)} PDFs already downloaded")
+        if refresh:
+            # downloaded PDFs are revalidated instead of skipped, unchanged ones cost a 304
+            pending_links = pdf_links
+        # one download per canonical PDF, the other variants share its file
+        pending_links = CanonicalIndex(pending_links).representatives()
+        failed_links = download_pdfs_http(pending_links, org, is_archive, refresh)
+        if failed_links:
+            # some hosts only serve the file to a real browser session
+            print(f"{org}: retrying {len(failed_links)} PDFs with Chrome")
+            download_pdfs_with_chrome(failed_links, download_dir, is_archive)
+            adopt_saved_pdfs(failed_links, org, is_archive, download_dir)
+        share_variants(pdf_links, org, is_archive)
+
+
+def build_wayback_index():
+    index = SnapshotIndex()
+    for org in WAYBACK_ORGS:
+        fetch_wayback_index(WAYBACK_INDEX_PREFIXES.get(org, []), index=index)
+    print(f"Indexed {len(index)} archived URLs")
+    return index
 
 
-def fetch_unhosted_wayback_links(archived_links):
+def fetch_unhosted_wayback_links(archived_links, index=None):
     file_path = f"output/links/unhosted_wayback_links.csv"
     with open(file_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
@@ -398,20 +444,37 @@ def fetch_unhosted_wayback_links(archived_links):
 
     for org in WAYBACK_ORGS:
         links = archived_links[archived_links["Organization"] == org]["Link"].to_list()
-        for link in tqdm(links):
-            wayback_link = fetch_wayback_url(link, limit=1)
-            try:
-                with open(file_path, "a", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    if link:
-                        writer.writerow([wayback_link, link])
-            except Exception as e:
-                print(f"An error occurred: {e}")
+        # variants of one article are resolved once and share its snapshot
+        variants = CanonicalIndex(links)
+        articles = [original_url(link) for link in variants.representatives()]
+        if index is not None:
+            wayback_links = [index.lookup(link) for link in articles]
+            missing = [
+                i for i, wayback_link in enumerate(wayback_links) if not wayback_link
+            ]
+            print(
+                f"{org}: {len(articles) - len(missing)} links resolved from the index"
+            )
+            resolved = fetch_wayback_urls([articles[i] for i in missing], limit=1)
+            for i, wayback_link in zip(missing, resolved):
+                wayback_links[i] = wayback_link
+        else:
+            wayback_links = fetch_wayback_urls(articles, limit=1)
+        snapshots = {}
+        for article, wayback_link in zip(variants.representatives(), wayback_links):
+            for link in variants.variants_of(article):
+                snapshots[link] = wayback_link
+        try:
+            with open(file_path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerows([snapshots[link], link] for link in links if link)
+        except Exception as e:
+            print(f"An error occurred: {e}")
 
 
-def merge_unhosted_wayback():
+def merge_unhosted_wayback(index=None):
     unhosted_df = pd.read_csv("output/links/unhosted_wayback_links.csv")
-    archived_links = pd.read_csv("output/links/wayback_article_links.csv")
+    archived_links = load_links(True)
     merged_df = pd.merge(
         archived_links,
         unhosted_df,
@@ -419,16 +482,28 @@ def merge_unhosted_wayback():
         how="left",
         suffixes=("", "_new"),
     )
+    if index is not None:
+        unresolved = merged_df["Wayback Link"].isna() & merged_df["Organization"].isin(
+            WAYBACK_ORGS
+        )
+        merged_df.loc[unresolved, "Wayback Link"] = merged_df.loc[
+            unresolved, "Link"
+        ].map(index.lookup)
     merged_df["Link"] = merged_df["Wayback Link"].fillna(merged_df["Link"])
     final_df = merged_df.drop(columns=["Wayback Link"])
     final_df.to_csv("output/links/merged_wayback_article_links.csv", index=False)
 
 
+def resolve_wayback_links():
+    index = build_wayback_index()
+    fetch_unhosted_wayback_links(load_links(True), index)
+    return index
+
+
 def fetch_pdfs():
-    curr_links = pd.read_csv("output/links/article_links.csv")
-    archived_links = pd.read_csv("output/links/wayback_article_links.csv")
-    fetch_unhosted_wayback_links(archived_links)
-    merge_unhosted_wayback()
+    curr_links = load_links(False)
+    index = resolve_wayback_links()
+    merge_unhosted_wayback(index)
     updated_archived_links = pd.read_csv(
         "output/links/merged_wayback_article_links.csv"
     )
@@ -0,0 +1,43 @@
+from config import (
+    ARTICLE_FETCH_WORKERS,
+    ARTICLE_DEFAULT_HOST_CONCURRENCY,
+    ARTICLE_HOST_CONCURRENCY,
+    ARTICLE_MAX_RETRIES,
+    ARTICLE_RETRY_BACKOFF,
+)
+from http_cache import conditional_get
+from http_session import make_session, HostSlots
+import requests
+from urllib.parse import urlsplit
+import random
+import time
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+session = make_session(ARTICLE_FETCH_WORKERS)
+host_slots = HostSlots(ARTICLE_HOST_CONCURRENCY, ARTICLE_DEFAULT_HOST_CONCURRENCY)
+
+
+def backoff_delay(attempt, base=ARTICLE_RETRY_BACKOFF):
+    # full jitter keeps workers that failed together from retrying together
+    return random.uniform(0, base * 2**attempt)
+
+
+def fetch_page(url, max_retries=ARTICLE_MAX_RETRIES):
+    attempt = 0
+    while True:
+        try:
+            # the slot is released while backing off so other pages keep flowing
+            with host_slots.slot(urlsplit(url).netloc):
+                page = conditional_get(session, url)
+            if page.status not in RETRY_STATUSES:
+                if page.status >= 400:
+                    raise requests.HTTPError(f"HTTP {page.status}")
+                return page
+            error = f"HTTP {page.status}"
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if attempt >= max_retries:
+            raise IOError(f"gave up after {attempt + 1} attempts ({error})")
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
@@ -0,0 +1,164 @@
+from config import HTML_RULES, FAST_HTML_PARSING
+from bs4 import BeautifulSoup, SoupStrainer
+from functools import lru_cache
+import re
+import soupsieve
+
+WHITESPACE = re.compile(r"\s+")
+
+TEXT_MODES = {
+    "raw": lambda text: text,
+    "strip": str.strip,
+    "lines": lambda text: text.strip().replace("\n", " "),
+    "collapse": lambda text: WHITESPACE.sub(" ", text.strip()),
+}
+
+LIST_ITEMS = soupsieve.compile("li")
+
+
+def make_soup(html, parse_only):
+    if FAST_HTML_PARSING:
+        return BeautifulSoup(html, features="lxml", parse_only=parse_only)
+    return BeautifulSoup(html, features="html.parser")
+
+
+def compile_field(field):
+    if field is None:
+        return None
+    selector, mode = field
+    return soupsieve.compile(selector), TEXT_MODES[mode]
+
+
+def class_filter(patterns):
+    # while lxml builds the tree the strainer sees the whole class attribute, so
+    # every class in it is matched on its own
+    patterns = [re.compile(pattern) for pattern in patterns]
+
+    def matches(value):
+        if value is None:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return any(pattern.fullmatch(c) for pattern in patterns for c in classes)
+
+    return matches
+
+
+def compile_strainer(parse_only):
+    parse_only = dict(parse_only)
+    if "classes" in parse_only:
+        parse_only["class_"] = class_filter(parse_only.pop("classes"))
+    return SoupStrainer(**parse_only)
+
+
+def compile_rule(rule):
+    text = TEXT_MODES[rule.get("text", "collapse")]
+    content = []
+    for alternative in rule["content"]:
+        many = "containers" in alternative
+        selector = alternative.get("containers", alternative.get("container"))
+        content.append(
+            {
+                "when": (
+                    soupsieve.compile(alternative["when"])
+                    if "when" in alternative
+                    else None
+                ),
+                "containers": (
+                    soupsieve.compile(selector) if selector is not None else None
+                ),
+                "many": many,
+                "blocks": (
+                    soupsieve.compile(alternative["blocks"])
+                    if "blocks" in alternative
+                    else None
+                ),
+                "text": (
+                    TEXT_MODES[alternative["text"]] if "text" in alternative else text
+                ),
+            }
+        )
+    return {
+        "parse_only": compile_strainer(rule["parse_only"]),
+        "scope": soupsieve.compile(rule["scope"]) if "scope" in rule else None,
+        "content_scope": (
+            soupsieve.compile(rule["content_scope"])
+            if "content_scope" in rule
+            else None
+        ),
+        "title": compile_field(rule["title"]),
+        "blurb": compile_field(rule.get("blurb")),
+        "content": content,
+        "skip": soupsieve.compile(rule["skip"]) if "skip" in rule else None,
+        "lists": rule.get("lists", True),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_rule(organization, is_archive=False):
+    # selectors are compiled once per process, not once per page
+    rule = dict(HTML_RULES[organization])
+    archived = rule.pop("archived", {})
+    if is_archive:
+        rule.update(archived)
+    return compile_rule(rule)
+
+
+def select_text(root, field):
+    pattern, text = field
+    elem = pattern.select_one(root)
+    if elem is None:
+        raise ValueError(f"no match for {pattern.pattern}")
+    return text(elem.text)
+
+
+def block_lines(block, rule, text):
+    if rule["skip"] is not None and rule["skip"].match(block):
+        return []
+    items = LIST_ITEMS.select(block) if rule["lists"] else []
+    if items:
+        return [text(item.text) for item in items]
+    return [text(block.text)]
+
+
+def content_lines(root, rule):
+    if rule["content_scope"] is not None:
+        root = rule["content_scope"].select_one(root)
+        if root is None:
+            raise ValueError("no match for content scope")
+    # the first alternative whose container is on the page is used
+    for alternative in rule["content"]:
+        if alternative["when"] is not None and not alternative["when"].match(root):
+            continue
+        if alternative["containers"] is None:
+            containers = [root]
+        elif alternative["many"]:
+            containers = alternative["containers"].select(root)
+        else:
+            container = alternative["containers"].select_one(root)
+            if container is None:
+                continue
+            containers = [container]
+        text = alternative["text"]
+        if alternative["blocks"] is None:
+            return [text(container.text) for container in containers]
+        return [
+            line
+            for container in containers
+            for block in alternative["blocks"].select(container)
+            for line in block_lines(block, rule, text)
+        ]
+    raise ValueError("no content container")
+
+
+def extract_article(html, organization, is_archive=False):
+    rule = get_rule(organization, is_archive)
+    root = make_soup(html, rule["parse_only"])
+    if rule["scope"] is not None:
+        root = rule["scope"].select_one(root)
+        if root is None:
+            raise ValueError("no match for scope")
+    full_content = [select_text(root, rule["title"])]
+    if rule["blurb"] is not None:
+        full_content.append(select_text(root, rule["blurb"]))
+    full_content.extend(content_lines(root, rule))
+    return "\n".join(full_content)
@@ -0,0 +1,95 @@
+from config import PAGE_CACHE_PATH, INCREMENTAL_REFRESH
+from collections import namedtuple
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+Page = namedtuple("Page", ["text", "content", "not_modified", "status"])
+
+
+def validator_headers(etag, last_modified):
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+class PageCache:
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body BLOB,
+                    content TEXT,
+                    fetched_at REAL NOT NULL
+                )
+                """)
+        return self.conn
+
+    def get(self, url):
+        with self.lock:
+            row = (
+                self.connect()
+                .execute(
+                    "SELECT etag, last_modified, body, content FROM pages WHERE url=?",
+                    (url,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        etag, last_modified, body, content = row
+        return etag, last_modified, zlib.decompress(body).decode("utf-8"), content
+
+    def put(self, url, etag, last_modified, text):
+        # a new body invalidates whatever was extracted from the old one
+        with self.lock:
+            conn = self.connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, NULL, ?)",
+                (
+                    url,
+                    etag,
+                    last_modified,
+                    zlib.compress(text.encode("utf-8")),
+                    time.time(),
+                ),
+            )
+            conn.commit()
+
+    def put_content(self, url, content):
+        with self.lock:
+            conn = self.connect()
+            conn.execute("UPDATE pages SET content=? WHERE url=?", (content, url))
+            conn.commit()
+
+
+def conditional_get(session, url, timeout=10, refresh=INCREMENTAL_REFRESH):
+    # validators are always stored, but only sent back when refreshing incrementally
+    cached = page_cache.get(url) if refresh else None
+    headers = validator_headers(*cached[:2]) if cached else {}
+    resp = session.get(url, headers=headers, timeout=timeout)
+    if resp.status_code == 304 and cached:
+        return Page(cached[2], cached[3], True, resp.status_code)
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if resp.ok and (etag or last_modified):
+        page_cache.put(url, etag, last_modified, resp.text)
+    return Page(resp.text, None, False, resp.status_code)
+
+
+page_cache = PageCache(PAGE_CACHE_PATH)
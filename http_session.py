@@ -0,0 +1,40 @@
+import requests
+from requests.adapters import HTTPAdapter
+import threading
+
+USER_AGENT = "Mozilla/5.0 (compatible; ResearchBot/1.0; +https://example.org/contact)"
+
+
+def make_session(pool_size=None, max_retries=0):
+    # every module talks to the same sites with the same identity; only the
+    # connection pool and the urllib3 retry policy differ between them
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    if pool_size is not None:
+        for prefix in ("http://", "https://"):
+            session.mount(
+                prefix,
+                HTTPAdapter(
+                    pool_connections=pool_size,
+                    pool_maxsize=pool_size,
+                    max_retries=max_retries,
+                ),
+            )
+    return session
+
+
+class HostSlots:
+    # one semaphore per host, sized from a per-host limit or the default
+    def __init__(self, limits, default):
+        self.limits = limits
+        self.default = default
+        self.slots = {}
+        self.lock = threading.Lock()
+
+    def slot(self, host):
+        with self.lock:
+            if host not in self.slots:
+                self.slots[host] = threading.BoundedSemaphore(
+                    self.limits.get(host, self.default)
+                )
+            return self.slots[host]
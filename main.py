@@ -1,11 +1,24 @@
-import fetcher
+from config import ORG_NAMES, PIPELINE_WORKERS
+import argparse
+import pipeline
 import reader
 
 if __name__ == "__main__":
-    print("Scraping pipeline started")
-    # fetcher.fetch_urls()
-    # fetcher.fetch_pdfs()
-    print("Links and PDFs Fetched!")
-    # reader.read_urls()
-    reader.retry_failed_pdfs()
-    print("Raw Text Scraped!")
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "stage",
+        nargs="?",
+        default="all",
+        choices=["all", *pipeline.STAGE_NAMES, "reparse"],
+    )
+    parser.add_argument("--org", action="append", choices=ORG_NAMES)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--workers", type=int, default=PIPELINE_WORKERS)
+    args = parser.parse_args()
+    if args.stage == "reparse":
+        # rebuilds HTML content from the stored snapshots, without the network
+        reader.reparse_snapshots(args.org or ORG_NAMES)
+    else:
+        print("Scraping pipeline started")
+        pipeline.run(args.stage, args.org or ORG_NAMES, args.force, args.workers)
+        print("Scraping pipeline finished!")
@@ -0,0 +1,61 @@
+from config import SPACY_MODEL, PDF_TEXT_ONLY, TESSDATA_PREFIX
+from functools import lru_cache
+import os
+
+# spaCy, docling and Tesseract are only imported and configured the first time a
+# PDF reader needs them, so the HTML readers and the retry scan start instantly
+
+
+@lru_cache(maxsize=None)
+def get_nlp(text_only=PDF_TEXT_ONLY):
+    import spacy
+
+    # spaCyLayout only needs a vocab and tokenizer to build the Doc; the tagger,
+    # parser and NER of the full model are never used for the Content column
+    if text_only:
+        return spacy.blank(SPACY_MODEL.split("_")[0])
+    return spacy.load(SPACY_MODEL)
+
+
+@lru_cache(maxsize=None)
+def get_ocr_format_option():
+    from docling.document_converter import FormatOption
+    from docling.pipeline.standard_pdf_pipeline import StandardPdfPipeline
+    from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
+    from docling.datamodel.pipeline_options import (
+        PdfPipelineOptions,
+        TesseractOcrOptions,
+    )
+
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.do_ocr = True
+    pipeline_options.do_table_structure = True
+    os.environ["TESSDATA_PREFIX"] = TESSDATA_PREFIX
+    ocr_options = TesseractOcrOptions(force_full_page_ocr=True)
+    pipeline_options.ocr_options = ocr_options
+    return FormatOption(
+        pipeline_cls=StandardPdfPipeline,
+        backend=PyPdfiumDocumentBackend,
+        pipeline_options=pipeline_options,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_layout(force_ocr=False, text_only=PDF_TEXT_ONLY):
+    from spacy_layout import spaCyLayout
+    from docling.datamodel.base_models import InputFormat
+
+    if force_ocr:
+        return spaCyLayout(
+            get_nlp(text_only),
+            docling_options={InputFormat.PDF: get_ocr_format_option()},
+        )
+    return spaCyLayout(get_nlp(text_only))
+
+
+@lru_cache(maxsize=None)
+def get_ocr_converter():
+    from docling.document_converter import DocumentConverter
+    from docling.datamodel.base_models import InputFormat
+
+    return DocumentConverter(format_options={InputFormat.PDF: get_ocr_format_option()})
@@ -0,0 +1,231 @@
+from config import PDF_MANIFEST_PATH, PDF_OBJECT_DIR, CANONICAL_SHARE_ARCHIVES
+from canonical import canonical_url, original_url
+from urllib.parse import urlsplit
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+MANIFEST_FIELDS = [
+    "link",
+    "organization",
+    "is_archive",
+    "sha256",
+    "size",
+    "path",
+    "etag",
+    "last_modified",
+    "status",
+    "updated_at",
+]
+
+
+def object_path(sha256):
+    return os.path.join(PDF_OBJECT_DIR, sha256[:2], f"{sha256}.pdf")
+
+
+def new_object_file():
+    # temp files live next to the objects so the final rename never crosses devices
+    os.makedirs(PDF_OBJECT_DIR, exist_ok=True)
+    return tempfile.mkstemp(dir=PDF_OBJECT_DIR, suffix=".part")
+
+
+def commit_object(tmp_path, sha256):
+    # identical content from another link (e.g. current and archived copies) is kept once
+    path = object_path(sha256)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+    return path
+
+
+def store_object(src_path, sha256):
+    # PDFs saved outside the store are tracked data, so they are linked into it
+    # (copied across devices) and left where they are
+    path = object_path(sha256)
+    if os.path.exists(path):
+        return path
+    fd, tmp_path = new_object_file()
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        os.link(src_path, tmp_path)
+    except OSError:
+        shutil.copyfile(src_path, tmp_path)
+    return commit_object(tmp_path, sha256)
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PdfManifest:
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS manifest (
+                    link TEXT PRIMARY KEY,
+                    organization TEXT,
+                    is_archive INTEGER,
+                    sha256 TEXT,
+                    size INTEGER,
+                    path TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS manifest_sha256 ON manifest (sha256)"
+            )
+        return self.conn
+
+    def get(self, link):
+        with self.lock:
+            row = (
+                self.connect()
+                .execute("SELECT * FROM manifest WHERE link=?", (link,))
+                .fetchone()
+            )
+            return dict(row) if row else None
+
+    def record(self, link, organization, is_archive, status, **fields):
+        entry = {field: None for field in MANIFEST_FIELDS}
+        entry.update(fields)
+        entry.update(
+            {
+                "link": link,
+                "organization": organization,
+                "is_archive": int(is_archive),
+                "status": status,
+                "updated_at": time.time(),
+            }
+        )
+        with self.lock:
+            conn = self.connect()
+            conn.execute(
+                f"INSERT OR REPLACE INTO manifest VALUES ({', '.join('?' * len(MANIFEST_FIELDS))})",
+                [entry[field] for field in MANIFEST_FIELDS],
+            )
+            conn.commit()
+
+    def done_links(self, organization):
+        # entries are keyed by link alone, so a url listed in both collections
+        # is one file and counts as done for either of them
+        with self.lock:
+            rows = (
+                self.connect()
+                .execute(
+                    "SELECT link, path FROM manifest WHERE organization=? AND status='done'",
+                    (organization,),
+                )
+                .fetchall()
+            )
+        # a file removed by hand is downloaded again instead of being trusted
+        return {row["link"] for row in rows if os.path.exists(row["path"])}
+
+    def done_entries(self, organization, is_archive=None):
+        sql = "SELECT * FROM manifest WHERE organization=? AND status='done'"
+        params = [organization]
+        if is_archive is not None:
+            sql += " AND is_archive=?"
+            params.append(int(is_archive))
+        with self.lock:
+            rows = self.connect().execute(sql, params).fetchall()
+        return [dict(row) for row in rows if os.path.exists(row["path"])]
+
+    def path_for(self, link):
+        entry = self.get(link)
+        if entry is None or entry["status"] != "done":
+            return None
+        return entry["path"]
+
+
+def adopt_pdf(link, organization, is_archive, src_path):
+    # records a PDF saved outside the store (older runs, the Chrome fallback)
+    sha256 = hash_file(src_path)
+    size = os.path.getsize(src_path)
+    path = store_object(src_path, sha256)
+    manifest.record(
+        link, organization, is_archive, "done", sha256=sha256, size=size, path=path
+    )
+    return path
+
+
+def pdf_filename(url):
+    # same name the PDF had when saved by Chrome into the per-organization folders
+    return os.path.basename(urlsplit(original_url(url)).path)
+
+
+def saved_pdf_dir(organization, is_archive):
+    return os.path.join(
+        "output", "pdfs", organization, "archived" if is_archive else "current"
+    )
+
+
+def adopt_saved_pdfs(pdf_links, organization, is_archive, saved_dir=None):
+    # picks up PDFs that Chrome (now or in earlier runs) saved under their link's file name
+    saved_dir = saved_dir or saved_pdf_dir(organization, is_archive)
+    adopted = 0
+    for link in pdf_links:
+        saved_path = os.path.join(saved_dir, pdf_filename(link))
+        if os.path.isfile(saved_path):
+            adopt_pdf(link, organization, is_archive, saved_path)
+            adopted += 1
+    return adopted
+
+
+def share_variants(pdf_links, organization, is_archive):
+    # links whose PDF is already stored under another variant of the same
+    # canonical URL point at that object instead of being downloaded again
+    stored = {}
+    entries = manifest.done_entries(
+        organization, None if CANONICAL_SHARE_ARCHIVES else is_archive
+    )
+    for entry in entries:
+        stored.setdefault(canonical_url(entry["link"]), entry)
+    done_links = manifest.done_links(organization)
+    shared = 0
+    for link in pdf_links:
+        entry = stored.get(canonical_url(link))
+        if link in done_links or entry is None:
+            continue
+        manifest.record(
+            link,
+            organization,
+            is_archive,
+            "done",
+            sha256=entry["sha256"],
+            size=entry["size"],
+            path=entry["path"],
+        )
+        shared += 1
+    return shared
+
+
+def find_pdf(link, organization, is_archive):
+    path = manifest.path_for(link)
+    if path is None and adopt_saved_pdfs([link], organization, is_archive):
+        path = manifest.path_for(link)
+    return path
+
+
+manifest = PdfManifest(PDF_MANIFEST_PATH)
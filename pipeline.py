@@ -0,0 +1,311 @@
+from config import (
+    ORG_NAMES,
+    PDF_ORGS,
+    URLS,
+    DISCOVERY_BACKENDS,
+    WAYBACK_ORGS,
+    WAYBACK_INDEX_PREFIXES,
+    HTML_RULES,
+    RETRY_EXTRACTION,
+    PIPELINE_STATE_PATH,
+    PIPELINE_WORKERS,
+    DISCOVERY_TTL,
+)
+from row_store import load_links
+from content_store import load_content, links_without_content
+from canonical import collection_links, MERGED_LINKS_CSV
+from pdf_store import manifest
+from browser_pool import shutdown as shutdown_browsers
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import fetcher
+import reader
+import hashlib
+import json
+import os
+import pandas as pd
+import threading
+import time
+
+UNHOSTED_LINKS_CSV = "output/links/unhosted_wayback_links.csv"
+
+# scope: "all" runs once whatever orgs were asked for, "orgs" runs once for the
+# selected orgs, "org" fans out to one run per org on the worker pool.
+# inputs/outputs take the same orgs argument as run and return plain values;
+# a stage is skipped when neither has changed since it last succeeded, unless
+# ttl seconds have passed or missing (the items it still has to do) lists items
+# that were not already left over by the last run; those are taken as permanent
+# failures and only tried again when the inputs change or on --force
+Stage = namedtuple(
+    "Stage",
+    ["name", "scope", "run", "inputs", "outputs", "missing", "ttl"],
+    defaults=[None, None],
+)
+
+
+def file_state(path):
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def frame_state(df):
+    # order-insensitive, so rewriting the same rows does not count as a change
+    if df.empty:
+        return None
+    rows = df.astype(str).sort_values(list(df.columns)).reset_index(drop=True)
+    return hashlib.sha256(
+        pd.util.hash_pandas_object(rows, index=False).values.tobytes()
+    ).hexdigest()
+
+
+def fingerprint(values):
+    return hashlib.sha256(
+        json.dumps(values, sort_keys=True, default=repr).encode("utf-8")
+    ).hexdigest()
+
+
+def org_links(orgs, is_archive, pdf_only=False):
+    links = collection_links(is_archive)
+    links = links[links["Organization"].isin(orgs)]
+    if pdf_only:
+        links = links[links["Type"] == "pdf"]
+    return links
+
+
+def link_state(orgs, is_archive, pdf_only=False):
+    return frame_state(org_links(orgs, is_archive, pdf_only)[["Organization", "Link"]])
+
+
+def discovered_state(orgs, archives=(False, True)):
+    states = []
+    for is_archive in archives:
+        links = load_links(is_archive)
+        links = links[links["Organization"].isin(orgs)]
+        states.append(frame_state(links[["Organization", "Link"]]))
+    return states
+
+
+def content_state(orgs):
+    return [
+        frame_state(load_content(is_archive, org, ["Link", "Content"]))
+        for org in orgs
+        for is_archive in (False, True)
+    ]
+
+
+def pdf_state(orgs):
+    return [sorted(manifest.done_links(org)) for org in orgs]
+
+
+def missing_pdfs(orgs):
+    missing = []
+    for is_archive in (False, True):
+        links = org_links(orgs, is_archive, pdf_only=True)
+        for org in orgs:
+            done = manifest.done_links(org)
+            org_pdfs = links[links["Organization"] == org]["Link"]
+            missing += [
+                [org, is_archive, link] for link in org_pdfs if link not in done
+            ]
+    return missing
+
+
+def missing_content(orgs):
+    return [
+        [org, is_archive, link]
+        for org in orgs
+        for is_archive in (False, True)
+        for link in links_without_content(org, is_archive)
+    ]
+
+
+def run_discover(orgs):
+    failed = fetcher.fetch_urls(orgs=orgs)
+    if failed:
+        raise RuntimeError(
+            ", ".join(f"{org} ({kind}) listing failed" for org, kind in failed)
+        )
+
+
+def run_download(orgs):
+    fetcher.download_pdfs(org_links(orgs, False), False)
+    fetcher.download_pdfs(org_links(orgs, True), True)
+
+
+def run_extract(orgs):
+    # links that already have content are left alone, rereading an org after a
+    # rules change is what "main.py reparse" is for
+    reader.read_urls(orgs, only_missing=True)
+
+
+def run_retry(orgs):
+    reader.retry_failed_pdfs(orgs=[org for org in orgs if org in PDF_ORGS])
+
+
+STAGES = [
+    Stage(
+        "discover",
+        "org",
+        run_discover,
+        lambda orgs: [
+            [URLS[org]["current"], DISCOVERY_BACKENDS.get(org)] for org in orgs
+        ],
+        discovered_state,
+        # new releases only show up by crawling the listings again
+        ttl=DISCOVERY_TTL,
+    ),
+    Stage(
+        "wayback",
+        "all",
+        lambda orgs: fetcher.resolve_wayback_links(),
+        lambda orgs: [discovered_state(WAYBACK_ORGS, [True]), WAYBACK_INDEX_PREFIXES],
+        lambda orgs: file_state(UNHOSTED_LINKS_CSV),
+    ),
+    Stage(
+        "merge",
+        "all",
+        lambda orgs: fetcher.merge_unhosted_wayback(),
+        lambda orgs: [
+            file_state(UNHOSTED_LINKS_CSV),
+            discovered_state(ORG_NAMES, [True]),
+        ],
+        lambda orgs: file_state(MERGED_LINKS_CSV),
+    ),
+    Stage(
+        "download",
+        "org",
+        run_download,
+        lambda orgs: [link_state(orgs, False, True), link_state(orgs, True, True)],
+        pdf_state,
+        missing_pdfs,
+    ),
+    Stage(
+        "extract",
+        "org",
+        run_extract,
+        lambda orgs: [
+            link_state(orgs, False),
+            link_state(orgs, True),
+            pdf_state(orgs),
+            [HTML_RULES.get(org) for org in orgs],
+        ],
+        content_state,
+        missing_content,
+    ),
+    Stage(
+        "retry",
+        "orgs",
+        run_retry,
+        lambda orgs: [content_state(orgs), RETRY_EXTRACTION],
+        content_state,
+    ),
+]
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+
+class PipelineState:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = None
+
+    def load(self):
+        if self.entries is None:
+            self.entries = {}
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+        return self.entries
+
+    def get(self, key):
+        with self.lock:
+            return self.load().get(key)
+
+    def put(self, key, entry):
+        with self.lock:
+            self.load()[key] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(self.path + ".tmp", self.path)
+
+
+state = PipelineState(PIPELINE_STATE_PATH)
+
+
+def new_missing(stage, orgs, recorded):
+    if stage.missing is None:
+        return []
+    failed = {tuple(item) for item in recorded.get("failed", [])}
+    return [item for item in stage.missing(orgs) if tuple(item) not in failed]
+
+
+def up_to_date(stage, orgs, recorded):
+    if recorded is None:
+        return False
+    if stage.ttl is not None and time.time() - recorded["finished_at"] > stage.ttl:
+        return False
+    inputs = fingerprint(stage.inputs(orgs))
+    outputs = fingerprint(stage.outputs(orgs))
+    if recorded["inputs"] != inputs or recorded["outputs"] != outputs:
+        return False
+    return not new_missing(stage, orgs, recorded)
+
+
+def run_target(stage, orgs, force):
+    key = stage.name if stage.scope == "all" else f"{stage.name}:{','.join(orgs)}"
+    if not force and up_to_date(stage, orgs, state.get(key)):
+        print(f"{key}: up to date, skipped")
+        return
+    print(f"{key}: running")
+    start = time.perf_counter()
+    # a run that raises is left unrecorded, so it is attempted again next time
+    stage.run(orgs)
+    failed = new_missing(stage, orgs, {})
+    # fingerprints are taken after the run, so a stage that rewrites its own
+    # input (retry) is not rerun just because of its own changes
+    state.put(
+        key,
+        {
+            "inputs": fingerprint(stage.inputs(orgs)),
+            "outputs": fingerprint(stage.outputs(orgs)),
+            "failed": failed,
+            "finished_at": time.time(),
+        },
+    )
+    print(f"{key}: done in {time.perf_counter() - start:.0f}s")
+    if failed:
+        print(f"{key}: {len(failed)} items failed, rerun with --force to retry them")
+
+
+def run_stage(stage, orgs=ORG_NAMES, force=False, max_workers=PIPELINE_WORKERS):
+    if stage.scope != "org":
+        run_target(stage, list(orgs), force)
+        return
+    # a failing org is reported and left unrecorded, so only it runs again
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            org: executor.submit(run_target, stage, [org], force) for org in orgs
+        }
+        failed = []
+        for org, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"{stage.name}:{org} failed: {e}")
+                failed.append(org)
+    shutdown_browsers()
+    if failed:
+        raise RuntimeError(f"{stage.name} failed for {', '.join(failed)}")
+
+
+def run(stage_name="all", orgs=ORG_NAMES, force=False, max_workers=PIPELINE_WORKERS):
+    stages = (
+        STAGES
+        if stage_name == "all"
+        else [stage for stage in STAGES if stage.name == stage_name]
+    )
+    for stage in stages:
+        run_stage(stage, orgs, force, max_workers)
@@ -0,0 +1,51 @@
+from config import (
+    PDF_ORGS,
+    QUALITY_SCORES_CSV,
+    RETRY_QUEUE_CSV,
+    RETRY_MAX_NON_ASCII_RATIO,
+)
+from content_store import load_content
+import pandas as pd
+
+
+def score_content(raw_content):
+    # rows are appended over time, so the last row for a link is its current content
+    latest = raw_content.groupby("Link", sort=False).tail(1)
+    content = latest["Content"].fillna("").astype(str)
+    length = content.str.len()
+    scores = latest[["Organization", "Link"]].copy()
+    scores["Length"] = length
+    scores["Glyphs"] = content.str.count("GLYPH")
+    scores["Non-ASCII Ratio"] = (
+        content.str.count(r"[^\x00-\x7f]") / length.where(length > 0)
+    ).fillna(0.0)
+    scores["Empty"] = content.str.strip().eq("")
+    scores["Retry"] = scores["Organization"].isin(PDF_ORGS) & (
+        (scores["Glyphs"] > 0)
+        | scores["Empty"]
+        | (scores["Non-ASCII Ratio"] > RETRY_MAX_NON_ASCII_RATIO)
+    )
+    return scores
+
+
+def score_quality():
+    all_scores = []
+    for is_archive in (False, True):
+        raw_content = load_content(is_archive)
+        if raw_content.empty:
+            continue
+        scores = score_content(raw_content)
+        scores.insert(2, "Is Archive", is_archive)
+        all_scores.append(scores)
+    if not all_scores:
+        # nothing has been read yet, so there is nothing to retry
+        retry_queue = pd.DataFrame(columns=["Organization", "Link", "Is Archive"])
+        retry_queue.to_csv(RETRY_QUEUE_CSV, index=False)
+        print("No content to score, retry queue is empty")
+        return retry_queue
+    scores = pd.concat(all_scores, ignore_index=True)
+    scores.to_csv(QUALITY_SCORES_CSV, index=False)
+    retry_queue = scores.loc[scores["Retry"], ["Organization", "Link", "Is Archive"]]
+    retry_queue.to_csv(RETRY_QUEUE_CSV, index=False)
+    print(f"Scored {len(scores)} documents, {len(retry_queue)} queued for retry")
+    return retry_queue
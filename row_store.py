@@ -0,0 +1,243 @@
+from config import (
+    LINK_CSV_FIELDS,
+    LINK_BACKEND,
+    ROW_STORE_PATH,
+    ROW_STORE_BATCH_SIZE,
+)
+import pandas as pd
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+import time
+
+LINK_CSVS = {
+    False: "output/links/article_links.csv",
+    True: "output/links/wayback_article_links.csv",
+}
+
+# CSV field -> column, the key columns (organization, link, is_archive) come first
+TABLES = {
+    "links": {
+        "Organization": "organization",
+        "Link": "link",
+        "Date Scraped": "date_scraped",
+        "Type": "type",
+    },
+    "articles": {
+        "Organization": "organization",
+        "Link": "link",
+        "Content": "content",
+    },
+}
+
+
+class RowStore:
+    def __init__(self, path, batch_size):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            for table, columns in TABLES.items():
+                values = ", ".join(
+                    f"{column} TEXT" for column in list(columns.values())[2:]
+                )
+                self.conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        organization TEXT NOT NULL,
+                        link TEXT NOT NULL,
+                        is_archive INTEGER NOT NULL,
+                        {values},
+                        updated_at REAL NOT NULL
+                    )
+                    """)
+                self.conn.execute(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_key ON {table} (organization, link, is_archive)"
+                )
+            # links already written by a reader run that has not finished yet
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    mode TEXT NOT NULL,
+                    organization TEXT NOT NULL,
+                    is_archive INTEGER NOT NULL,
+                    link TEXT NOT NULL,
+                    done_at REAL NOT NULL,
+                    PRIMARY KEY (mode, organization, is_archive, link)
+                )
+                """)
+        return self.conn
+
+    def upsert(self, table, rows, is_archive):
+        # one transaction per batch; a link seen again replaces its earlier row
+        fields = TABLES[table]
+        columns = list(fields.values())
+        updates = ", ".join(f"{column}=excluded.{column}" for column in columns[2:])
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}, is_archive, updated_at) "
+            f"VALUES ({', '.join('?' * (len(columns) + 2))}) "
+            f"ON CONFLICT (organization, link, is_archive) DO UPDATE SET {updates}, updated_at=excluded.updated_at"
+        )
+        now = time.time()
+        values = [
+            [row.get(field) for field in fields] + [int(is_archive), now]
+            for row in rows
+        ]
+        with self.lock:
+            conn = self.connect()
+            for start in range(0, len(values), self.batch_size):
+                with conn:
+                    conn.executemany(sql, values[start : start + self.batch_size])
+
+    def load(self, table, is_archive, organization=None, fields=None):
+        fields = fields or list(TABLES[table])
+        columns = ", ".join(f'{TABLES[table][field]} AS "{field}"' for field in fields)
+        sql = f"SELECT {columns} FROM {table} WHERE is_archive=?"
+        params = [int(is_archive)]
+        if organization is not None:
+            sql += " AND organization=?"
+            params.append(organization)
+        with self.lock:
+            return pd.read_sql_query(
+                sql + " ORDER BY rowid", self.connect(), params=params
+            )
+
+    def count(self, table, is_archive):
+        with self.lock:
+            return (
+                self.connect()
+                .execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE is_archive=?",
+                    (int(is_archive),),
+                )
+                .fetchone()[0]
+            )
+
+    def mark_done(self, mode, organization, is_archive, links):
+        now = time.time()
+        with self.lock:
+            conn = self.connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (mode, organization, int(is_archive), link, now)
+                        for link in links
+                    ],
+                )
+
+    def done_links(self, mode, organization, is_archive):
+        with self.lock:
+            rows = (
+                self.connect()
+                .execute(
+                    "SELECT link FROM checkpoints WHERE mode=? AND organization=? AND is_archive=?",
+                    (mode, organization, int(is_archive)),
+                )
+                .fetchall()
+            )
+        return {link for (link,) in rows}
+
+    def clear_done(self, mode, organization, is_archive):
+        with self.lock:
+            conn = self.connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM checkpoints WHERE mode=? AND organization=? AND is_archive=?",
+                    (mode, organization, int(is_archive)),
+                )
+
+
+csv_lock = threading.Lock()
+
+
+def append_links_csv(new_rows, is_archive):
+    link_csv = LINK_CSVS[is_archive]
+
+    # discovery jobs run in parallel, so writes are serialized to keep rows whole
+    with csv_lock, open(link_csv, "a", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=LINK_CSV_FIELDS)
+        if os.stat(link_csv).st_size == 0:
+            writer.writeheader()
+        writer.writerows(new_rows)
+
+
+seed_lock = threading.Lock()
+
+
+def seed_links(is_archive):
+    # links discovered before the store existed are taken over once, before the
+    # first link is written to or read from it
+    with seed_lock:
+        if row_store.count("links", is_archive) == 0 and os.path.exists(
+            LINK_CSVS[is_archive]
+        ):
+            import_links(is_archive)
+
+
+def append_links(new_rows, is_archive):
+    # an anchor without an href has nothing to read, and the store needs a link
+    rows = [row for row in new_rows if row.get("Link")]
+    if len(rows) < len(new_rows):
+        print(f"Skipped {len(new_rows) - len(rows)} links without a URL")
+    match LINK_BACKEND:
+        case "sqlite":
+            seed_links(is_archive)
+            row_store.upsert("links", rows, is_archive)
+        case _:
+            append_links_csv(rows, is_archive)
+
+
+def load_links(is_archive):
+    match LINK_BACKEND:
+        case "sqlite":
+            seed_links(is_archive)
+            return row_store.load("links", is_archive)
+        case _:
+            return pd.read_csv(LINK_CSVS[is_archive])
+
+
+def import_links(is_archive):
+    df = pd.read_csv(LINK_CSVS[is_archive], dtype=str).fillna("")
+    df = df[df["Link"] != ""]
+    row_store.upsert("links", df.to_dict("records"), is_archive)
+    print(f"Imported {len(df)} links from {LINK_CSVS[is_archive]}")
+
+
+def export_links(is_archive):
+    df = row_store.load("links", is_archive)
+    df.to_csv(LINK_CSVS[is_archive], index=False)
+    print(f"Exported {len(df)} links to {LINK_CSVS[is_archive]}")
+
+
+row_store = RowStore(ROW_STORE_PATH, ROW_STORE_BATCH_SIZE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["import", "export", "missing"])
+    args = parser.parse_args()
+    for is_archive in (False, True):
+        match args.command:
+            case "import":
+                if os.path.exists(LINK_CSVS[is_archive]):
+                    import_links(is_archive)
+            case "export":
+                export_links(is_archive)
+            case "missing":
+                # content may live in any backend, so it is read through content_store
+                from content_store import links_without_content
+
+                links = row_store.load("links", is_archive, fields=["Organization"])
+                for organization in links["Organization"].unique():
+                    missing = links_without_content(organization, is_archive)
+                    label = "archived" if is_archive else "current"
+                    print(
+                        f"{organization} ({label}): {len(missing)} links without content"
+                    )
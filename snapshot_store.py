@@ -0,0 +1,160 @@
+from config import SNAPSHOT_DIR, SNAPSHOT_INDEX_PATH, SNAPSHOT_FILE_MAX_BYTES
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# every record is its own gzip member, appended to the current segment file:
+# a JSON header line followed by the page HTML. The index only stores where each
+# record starts, so one snapshot is read back without decompressing its neighbours
+
+
+class SnapshotStore:
+    def __init__(self, directory, index_path, max_file_bytes):
+        self.directory = directory
+        self.index_path = index_path
+        self.max_file_bytes = max_file_bytes
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.conn = sqlite3.connect(self.index_path, check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    url TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    organization TEXT,
+                    is_archive INTEGER,
+                    file TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    PRIMARY KEY (url, fetched_at)
+                )
+                """)
+        return self.conn
+
+    def segment(self, conn):
+        # segments are never rewritten, a full one is simply left behind
+        (latest,) = conn.execute("SELECT MAX(file) FROM snapshots").fetchone()
+        if latest and os.path.getsize(os.path.join(self.directory, latest)) < (
+            self.max_file_bytes
+        ):
+            return latest
+        number = int(latest.split("-")[1].split(".")[0]) + 1 if latest else 0
+        return f"snapshots-{number:05d}.jsonl.gz"
+
+    def put(self, url, html, organization, is_archive):
+        fetched_at = time.time()
+        header = {
+            "url": url,
+            "fetched_at": fetched_at,
+            "organization": organization,
+            "is_archive": bool(is_archive),
+        }
+        record = gzip.compress(
+            (json.dumps(header) + "\n" + html).encode("utf-8"), mtime=0
+        )
+        with self.lock:
+            conn = self.connect()
+            name = self.segment(conn)
+            with open(os.path.join(self.directory, name), "ab") as f:
+                offset = f.tell()
+                f.write(record)
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    fetched_at,
+                    organization,
+                    int(is_archive),
+                    name,
+                    offset,
+                    len(record),
+                ),
+            )
+            conn.commit()
+
+    def read(self, name, offset, length):
+        with open(os.path.join(self.directory, name), "rb") as f:
+            f.seek(offset)
+            record = gzip.decompress(f.read(length)).decode("utf-8")
+        header, html = record.split("\n", 1)
+        return json.loads(header), html
+
+    def get(self, url, before=None):
+        # the latest snapshot of the url, or the latest one fetched before a time
+        with self.lock:
+            row = (
+                self.connect()
+                .execute(
+                    "SELECT file, offset, length FROM snapshots WHERE url=? AND fetched_at<=? ORDER BY fetched_at DESC LIMIT 1",
+                    (url, before if before is not None else float("inf")),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        return self.read(*row)[1]
+
+    def has(self, url):
+        with self.lock:
+            return (
+                self.connect()
+                .execute("SELECT 1 FROM snapshots WHERE url=? LIMIT 1", (url,))
+                .fetchone()
+                is not None
+            )
+
+    def latest(self, organization, is_archive):
+        # yields (url, html) for the newest snapshot of every url, in file order
+        with self.lock:
+            rows = (
+                self.connect()
+                .execute(
+                    """
+                    SELECT url, file, offset, length FROM snapshots AS s
+                    WHERE organization=? AND is_archive=? AND fetched_at=(
+                        SELECT MAX(fetched_at) FROM snapshots WHERE url=s.url
+                        AND organization=s.organization AND is_archive=s.is_archive
+                    )
+                    ORDER BY file, offset
+                    """,
+                    (organization, int(is_archive)),
+                )
+                .fetchall()
+            )
+        for url, name, offset, length in rows:
+            yield url, self.read(name, offset, length)[1]
+
+    def stats(self):
+        with self.lock:
+            records, urls, size = (
+                self.connect()
+                .execute(
+                    "SELECT COUNT(*), COUNT(DISTINCT url), COALESCE(SUM(length), 0) FROM snapshots"
+                )
+                .fetchone()
+            )
+        return {"records": records, "urls": urls, "bytes": size}
+
+
+snapshot_store = SnapshotStore(
+    SNAPSHOT_DIR, SNAPSHOT_INDEX_PATH, SNAPSHOT_FILE_MAX_BYTES
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["stats", "show"])
+    parser.add_argument("url", nargs="?")
+    args = parser.parse_args()
+    match args.command:
+        case "stats":
+            print(json.dumps(snapshot_store.stats(), indent=2))
+        case "show":
+            print(snapshot_store.get(args.url))
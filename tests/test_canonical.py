@@ -0,0 +1,35 @@
+from canonical import canonical_url, CanonicalIndex
+from wayback import SnapshotIndex
+
+PDF = "sustainability-prd-cdn.suncor.com/-/media/project/suncor/files/news-releases/2019/release.pdf"
+
+
+def test_variants_share_one_key():
+    variants = [
+        f"https://{PDF}",
+        f"http://www.{PDF.replace('.com/', '.com:80/', 1)}",
+        f"http://web.archive.org/web/20200101000000/https://{PDF}",
+        f"http://web.archive.org/web/20200101000000id_/http://www.{PDF}",
+    ]
+    assert len({canonical_url(url) for url in variants}) == 1
+
+
+def test_pdf_versions_keep_their_query():
+    old = f"https://{PDF}?modified=20190228"
+    new = f"https://{PDF}?modified=20240507213212"
+    assert canonical_url(old) != canonical_url(new)
+    assert canonical_url(old, keep_query=False) == canonical_url(new, keep_query=False)
+    assert CanonicalIndex([old, new]).representatives() == [old, new]
+    assert len(CanonicalIndex([old, new], keep_query=False)) == 1
+
+
+def test_snapshot_index_resolves_each_pdf_version():
+    index = SnapshotIndex()
+    index.add("20190301000000", f"https://{PDF}?modified=20190228")
+    index.add("20240601000000", f"https://{PDF}?modified=20240507213212")
+    assert index.lookup(f"https://www.{PDF}?modified=20240507213212") == (
+        f"http://web.archive.org/web/20240601000000/https://{PDF}?modified=20240507213212"
+    )
+    assert index.lookup(f"https://{PDF}?modified=20190228").startswith(
+        "http://web.archive.org/web/20190301000000/"
+    )
@@ -0,0 +1,60 @@
+import content_store
+import pandas as pd
+import pytest
+
+ROWS = [
+    {
+        "Organization": "Suncor Energy",
+        "Link": "https://suncor.com/a.pdf",
+        "Content": "A",
+    },
+    {"Organization": "Enbridge", "Link": "https://enbridge.com/b", "Content": "B"},
+]
+
+
+@pytest.fixture
+def content_csvs(tmp_path, monkeypatch):
+    csvs = {
+        False: str(tmp_path / "raw_content.csv"),
+        True: str(tmp_path / "raw_wayback_content.csv"),
+    }
+    monkeypatch.setattr(content_store, "CONTENT_CSVS", csvs)
+    monkeypatch.setattr(content_store, "CONTENT_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(content_store, "CONTENT_BACKEND", "parquet")
+    pd.DataFrame(ROWS).to_csv(csvs[False], index=False)
+    return csvs
+
+
+def test_first_load_seeds_store_from_csv(content_csvs):
+    df = content_store.load_content(False)
+    assert sorted(df["Link"]) == sorted(row["Link"] for row in ROWS)
+    assert content_store.load_content(False, "Enbridge")["Content"].to_list() == ["B"]
+    # seeding happens once, a second load does not import the rows again
+    assert len(content_store.load_content(False)) == len(ROWS)
+    assert content_store.load_content(True).empty
+
+
+def test_first_write_keeps_csv_rows(content_csvs):
+    new_row = {
+        "Organization": "Enbridge",
+        "Link": "https://enbridge.com/c",
+        "Content": "C",
+    }
+    content_store.append_rows([new_row], False)
+    df = content_store.load_content(False)
+    assert sorted(df["Link"]) == sorted(
+        [row["Link"] for row in ROWS] + [new_row["Link"]]
+    )
+
+
+def test_links_without_content_reads_the_content_backend(content_csvs, monkeypatch):
+    links = pd.DataFrame(
+        {
+            "Organization": ["Enbridge", "Enbridge"],
+            "Link": ["https://enbridge.com/b", "https://enbridge.com/unread"],
+        }
+    )
+    monkeypatch.setattr(content_store, "collection_links", lambda is_archive: links)
+    assert content_store.links_without_content("Enbridge", False) == [
+        "https://enbridge.com/unread"
+    ]
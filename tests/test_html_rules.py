@@ -0,0 +1,116 @@
+import html_rules
+import os
+import pytest
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+# (fixture, organization, is_archive, expected Content)
+PAGES = [
+    (
+        "pembina.html",
+        "Pembina Pipeline",
+        False,
+        "Pembina Pipeline announces\nfirst quarter results\n"
+        "CALGARY, AB, May 4, 2023 /CNW/ - Pembina Pipeline Corporation reported   "
+        "first quarter earnings of $500 million.\n"
+        "Adjusted EBITDA was a quarterly record.\n"
+        "The Board declared a common share dividend.",
+    ),
+    (
+        "pembina_nested.html",
+        "Pembina Pipeline",
+        False,
+        "Pembina completes acquisition\n"
+        "Pembina Pipeline Corporation has closed the previously announced     "
+        "acquisition.\n"
+        "The transaction was funded with cash on hand.",
+    ),
+    # only the first news body is read, even when a later one has paragraphs
+    (
+        "pembina_first_body.html",
+        "Pembina Pipeline",
+        False,
+        "Pembina declares dividend\n"
+        "The Board of Directors declared a quarterly dividend.",
+    ),
+    (
+        "pembina_empty_div.html",
+        "Pembina Pipeline",
+        False,
+        "Pembina files annual report",
+    ),
+    (
+        "imperial.html",
+        "Imperial Oil",
+        False,
+        "Imperial announces net-zero pathway update\n"
+        "CALGARY - Imperial Oil Limited today announced progress on the Pathways "
+        "Alliance.\n"
+        "Carbon capture network\n"
+        "Lower-emission technologies\n"
+        "Source: Imperial\n"
+        "Cautionary statement about forward-looking information.",
+    ),
+    (
+        "enbridge.html",
+        "Enbridge",
+        False,
+        "Enbridge reports record throughput\n"
+        "CALGARY, AB - Enbridge Inc. reported record Mainline throughput.\n"
+        "Liquids Pipelines\n"
+        "Gas Transmission\n"
+        "First item\n"
+        "About Enbridge Inc.",
+    ),
+    (
+        "shell.html",
+        "Shell Canada",
+        False,
+        "Shell Canada releases energy transition report\n"
+        "Published May 2023\n"
+        "Highlights\n"
+        "Shell Canada today released its annual report.\n"
+        "Quest carbon capture\n"
+        "Polaris project\n"
+        "More information is available online.",
+    ),
+    (
+        "shell_archived.html",
+        "Shell Canada",
+        True,
+        "Shell Canada announces Quest milestone\n"
+        "Five million tonnes captured\n"
+        "Quest\n"
+        "Shell Canada's Quest facility reached a milestone.\n"
+        "Safe storage\n"
+        "Monitoring",
+    ),
+]
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def extract(html, organization, is_archive, fast, monkeypatch):
+    monkeypatch.setattr(html_rules, "FAST_HTML_PARSING", fast)
+    return html_rules.extract_article(html, organization, is_archive)
+
+
+@pytest.mark.parametrize("name, organization, is_archive, expected", PAGES)
+def test_lxml_matches_html_parser(
+    name, organization, is_archive, expected, monkeypatch
+):
+    html = read_fixture(name)
+    slow = extract(html, organization, is_archive, False, monkeypatch)
+    fast = extract(html, organization, is_archive, True, monkeypatch)
+    assert fast == slow
+    assert fast == expected
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_missing_content_raises(fast, monkeypatch):
+    html = "<html><body><h1 class='large-text'>Title</h1></body></html>"
+    with pytest.raises(ValueError):
+        extract(html, "Pembina Pipeline", False, fast, monkeypatch)
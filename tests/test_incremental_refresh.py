@@ -0,0 +1,67 @@
+from conftest import ETAG, PAGES
+import downloader
+import http_cache
+import pdf_store
+import requests
+
+
+def test_conditional_get_reuses_stored_page_on_304(
+    stand_in_server, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(
+        http_cache, "page_cache", http_cache.PageCache(str(tmp_path / "pages.sqlite"))
+    )
+    url = stand_in_server.url + "/article.html"
+    session = requests.Session()
+
+    first = http_cache.conditional_get(session, url, refresh=True)
+    assert first.status == 200
+    assert not first.not_modified
+    http_cache.page_cache.put_content(url, "Release")
+
+    second = http_cache.conditional_get(session, url, refresh=True)
+    assert stand_in_server.statuses == [200, 304]
+    assert stand_in_server.requests[-1][1]["If-None-Match"] == ETAG
+    assert second.not_modified
+    assert second.text == PAGES["/article.html"][1].decode("utf-8")
+    assert second.content == "Release"
+
+
+def test_conditional_get_sends_no_validators_without_refresh(
+    stand_in_server, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(
+        http_cache, "page_cache", http_cache.PageCache(str(tmp_path / "pages.sqlite"))
+    )
+    url = stand_in_server.url + "/article.html"
+    session = requests.Session()
+
+    http_cache.conditional_get(session, url, refresh=False)
+    page = http_cache.conditional_get(session, url, refresh=False)
+    assert stand_in_server.statuses == [200, 200]
+    assert not page.not_modified
+
+
+def test_download_pdf_keeps_stored_object_on_304(
+    stand_in_server, tmp_path, monkeypatch
+):
+    manifest = pdf_store.PdfManifest(str(tmp_path / "manifest.sqlite"))
+    monkeypatch.setattr(pdf_store, "PDF_OBJECT_DIR", str(tmp_path / "objects"))
+    monkeypatch.setattr(pdf_store, "manifest", manifest)
+    monkeypatch.setattr(downloader, "manifest", manifest)
+    url = stand_in_server.url + "/release.pdf"
+
+    assert downloader.download_pdf(url, "Suncor Energy", False)
+    stored = manifest.get(url)
+    assert stored["status"] == "done"
+    assert stored["etag"] == ETAG
+
+    assert downloader.download_pdf(url, "Suncor Energy", False, refresh=True)
+    assert stand_in_server.statuses == [200, 304]
+    assert stand_in_server.requests[-1][1]["If-None-Match"] == ETAG
+    refreshed = manifest.get(url)
+    assert refreshed["status"] == "done"
+    assert refreshed["path"] == stored["path"]
+    assert refreshed["sha256"] == stored["sha256"]
+    with open(refreshed["path"], "rb") as f:
+        assert f.read() == PAGES["/release.pdf"][1]
@@ -0,0 +1,65 @@
+import fetcher
+import pdf_store
+import os
+import pandas as pd
+import pytest
+
+PDF = b"%PDF-1.4\n% saved by Chrome\n%%EOF\n"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    manifest = pdf_store.PdfManifest(str(tmp_path / "manifest.sqlite"))
+    monkeypatch.setattr(pdf_store, "PDF_OBJECT_DIR", str(tmp_path / "objects"))
+    monkeypatch.setattr(pdf_store, "manifest", manifest)
+    return manifest
+
+
+def test_adopting_leaves_the_saved_pdf_in_place(store, tmp_path):
+    saved_dir = tmp_path / "Suncor Energy" / "current"
+    saved_dir.mkdir(parents=True)
+    for name in ("release.pdf", "copy.pdf"):
+        (saved_dir / name).write_bytes(PDF)
+    links = ["https://suncor.com/release.pdf", "https://suncor.com/copy.pdf"]
+
+    assert (
+        pdf_store.adopt_saved_pdfs(links, "Suncor Energy", False, str(saved_dir)) == 2
+    )
+    # both names stay in the working tree, their identical content is stored once
+    assert (saved_dir / "release.pdf").read_bytes() == PDF
+    assert (saved_dir / "copy.pdf").read_bytes() == PDF
+    paths = {store.path_for(link) for link in links}
+    assert len(paths) == 1
+    with open(paths.pop(), "rb") as f:
+        assert f.read() == PDF
+    assert not [
+        name
+        for root, dirs, files in os.walk(pdf_store.PDF_OBJECT_DIR)
+        for name in files
+        if name.endswith(".part")
+    ]
+
+
+def test_link_in_both_collections_is_downloaded_once(store, tmp_path, monkeypatch):
+    link = "https://suncor.com/release.pdf"
+    downloads = []
+
+    def download_pdfs_http(links, org, is_archive, refresh):
+        downloads.extend((is_archive, pdf_link) for pdf_link in links)
+        for pdf_link in links:
+            saved = tmp_path / "release.pdf"
+            saved.write_bytes(PDF)
+            pdf_store.adopt_pdf(pdf_link, org, is_archive, str(saved))
+        return []
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(fetcher, "manifest", store)
+    monkeypatch.setattr(fetcher, "download_pdfs_http", download_pdfs_http)
+    links = pd.DataFrame(
+        {"Organization": ["Suncor Energy"], "Link": [link], "Type": ["pdf"]}
+    )
+    for _ in range(2):
+        fetcher.download_pdfs(links, False)
+        fetcher.download_pdfs(links, True)
+    assert downloads == [(False, link)]
+    assert store.done_links("Suncor Energy") == {link}
@@ -0,0 +1,111 @@
+import pandas as pd
+import pipeline
+import reader
+import pytest
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    state = pipeline.PipelineState(str(tmp_path / "pipeline.json"))
+    monkeypatch.setattr(pipeline, "state", state)
+    monkeypatch.setattr(pipeline, "shutdown_browsers", lambda: None)
+    return state
+
+
+def make_stage(runs, missing=None, ttl=None, fail=()):
+    def run(orgs):
+        runs.append(orgs)
+        if orgs[0] in fail:
+            raise RuntimeError("listing failed")
+
+    return pipeline.Stage(
+        "test",
+        "org",
+        run,
+        lambda orgs: ["inputs"],
+        lambda orgs: ["outputs"],
+        missing,
+        ttl,
+    )
+
+
+def test_unchanged_stage_is_skipped(state):
+    runs = []
+    stage = make_stage(runs)
+    pipeline.run_stage(stage, ["Enbridge"])
+    pipeline.run_stage(stage, ["Enbridge"])
+    assert runs == [["Enbridge"]]
+
+
+def test_failed_org_is_left_unrecorded(state):
+    runs = []
+    stage = make_stage(runs, fail=["Shell Canada"])
+    with pytest.raises(RuntimeError):
+        pipeline.run_stage(stage, ["Enbridge", "Shell Canada"], max_workers=1)
+    assert state.get("test:Enbridge") is not None
+    assert state.get("test:Shell Canada") is None
+    with pytest.raises(RuntimeError):
+        pipeline.run_stage(stage, ["Enbridge", "Shell Canada"], max_workers=1)
+    assert runs.count(["Enbridge"]) == 1
+    assert runs.count(["Shell Canada"]) == 2
+
+
+def test_stage_runs_again_only_for_newly_missing_items(state):
+    runs = []
+    missing = [["a"]]
+    stage = make_stage(runs, missing=lambda orgs: missing)
+    pipeline.run_stage(stage, ["Enbridge"])
+    pipeline.run_stage(stage, ["Enbridge"])
+    assert len(runs) == 1
+    missing.append(["b"])
+    pipeline.run_stage(stage, ["Enbridge"])
+    assert len(runs) == 2
+    pipeline.run_stage(stage, ["Enbridge"], force=True)
+    assert len(runs) == 3
+
+
+def test_unreadable_link_is_not_read_again(state, monkeypatch):
+    content = {False: {"https://example.com/a"}, True: set()}
+    links = {False: ["https://example.com/a", "https://example.com/dead"], True: []}
+    reads = []
+
+    def links_without_content(org, is_archive):
+        return [link for link in links[is_archive] if link not in content[is_archive]]
+
+    monkeypatch.setattr(pipeline, "links_without_content", links_without_content)
+    monkeypatch.setattr(reader, "links_without_content", links_without_content)
+    monkeypatch.setattr(
+        reader,
+        "collection_links",
+        lambda is_archive: pd.DataFrame(
+            {"Organization": "Pembina", "Link": links[is_archive]}, dtype=str
+        ),
+    )
+    monkeypatch.setattr(reader, "shutdown_browsers", lambda: None)
+    monkeypatch.setattr(
+        reader,
+        "read_org_articles",
+        lambda org, urls, is_archive: reads.append((is_archive, urls)),
+    )
+    stage = pipeline.Stage(
+        "extract",
+        "org",
+        pipeline.run_extract,
+        lambda orgs: ["inputs"],
+        lambda orgs: ["outputs"],
+        pipeline.missing_content,
+    )
+    pipeline.run_stage(stage, ["Pembina"])
+    assert reads == [(False, ["https://example.com/dead"])]
+    pipeline.run_stage(stage, ["Pembina"])
+    assert len(reads) == 1
+
+
+def test_stage_runs_again_after_ttl(state):
+    runs = []
+    stage = make_stage(runs, ttl=60)
+    pipeline.run_stage(stage, ["Enbridge"])
+    entry = state.get("test:Enbridge")
+    state.put("test:Enbridge", {**entry, "finished_at": entry["finished_at"] - 61})
+    pipeline.run_stage(stage, ["Enbridge"])
+    assert len(runs) == 2
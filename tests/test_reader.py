@@ -0,0 +1,48 @@
+import content_store
+import pandas as pd
+import pytest
+import reader
+
+LIVE = "https://pembina.com/media/release"
+CAPTURE = "http://web.archive.org/web/20200101000000/https://pembina.com/media/old"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    csvs = {
+        False: str(tmp_path / "raw_content.csv"),
+        True: str(tmp_path / "raw_wayback_content.csv"),
+    }
+    monkeypatch.setattr(content_store, "CONTENT_CSVS", csvs)
+    monkeypatch.setattr(content_store, "CONTENT_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(content_store, "CONTENT_BACKEND", "parquet")
+    monkeypatch.setattr(reader, "shutdown_browsers", lambda: None)
+    links = {
+        False: pd.DataFrame({"Organization": ["Pembina"], "Link": [LIVE]}),
+        True: pd.DataFrame({"Organization": ["Pembina"] * 2, "Link": [LIVE, CAPTURE]}),
+    }
+    monkeypatch.setattr(
+        reader, "collection_links", lambda is_archive: links[is_archive]
+    )
+    reads = []
+
+    def read_org_articles(org, urls, is_archive):
+        reads.append((is_archive, urls))
+        content_store.append_rows(
+            [{"Organization": org, "Link": url, "Content": url} for url in urls],
+            is_archive,
+        )
+
+    monkeypatch.setattr(reader, "read_org_articles", read_org_articles)
+    return reads
+
+
+def test_url_in_both_collections_is_read_once(store):
+    reader.read_urls(["Pembina"])
+    # the Wayback capture keeps its own read
+    assert store == [(False, [LIVE]), (True, [CAPTURE])]
+    archived = content_store.load_content(True, "Pembina")
+    assert dict(zip(archived["Link"], archived["Content"])) == {
+        LIVE: LIVE,
+        CAPTURE: CAPTURE,
+    }
@@ -0,0 +1,52 @@
+import row_store
+import pandas as pd
+import pytest
+
+CSV_ROWS = [
+    {
+        "Organization": "Enbridge",
+        "Link": "https://www.enbridge.com/media-center/news/details?id=1",
+        "Date Scraped": "2024-05-01",
+        "Type": "html",
+    },
+]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    csvs = {
+        False: str(tmp_path / "article_links.csv"),
+        True: str(tmp_path / "wayback_article_links.csv"),
+    }
+    store = row_store.RowStore(str(tmp_path / "store.sqlite"), 500)
+    monkeypatch.setattr(row_store, "LINK_CSVS", csvs)
+    monkeypatch.setattr(row_store, "LINK_BACKEND", "sqlite")
+    monkeypatch.setattr(row_store, "row_store", store)
+    pd.DataFrame(CSV_ROWS).to_csv(csvs[False], index=False)
+    return store
+
+
+def test_first_append_keeps_csv_links(store):
+    new_row = {
+        "Organization": "Enbridge",
+        "Link": "https://www.enbridge.com/media-center/news/details?id=2",
+        "Date Scraped": "2024-06-01",
+        "Type": "html",
+    }
+    row_store.append_links([new_row], False)
+    links = row_store.load_links(False)
+    assert links["Link"].to_list() == [CSV_ROWS[0]["Link"], new_row["Link"]]
+    assert row_store.load_links(True).empty
+
+
+def test_links_without_url_are_skipped(store):
+    rows = [
+        {"Organization": "Shell Canada", "Link": None, "Type": "html"},
+        {
+            "Organization": "Shell Canada",
+            "Link": "https://www.shell.ca/a",
+            "Type": "html",
+        },
+    ]
+    row_store.append_links(rows, True)
+    assert row_store.load_links(True)["Link"].to_list() == ["https://www.shell.ca/a"]
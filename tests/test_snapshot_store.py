@@ -0,0 +1,25 @@
+from snapshot_store import SnapshotStore
+
+
+def make_store(tmp_path):
+    return SnapshotStore(
+        str(tmp_path / "snapshots"), str(tmp_path / "index.sqlite"), 1024 * 1024
+    )
+
+
+def test_latest_keeps_a_url_in_each_collection(tmp_path):
+    store = make_store(tmp_path)
+    url = "https://www.pembina.com/media-centre/news-releases/news-details/?nid=1"
+    store.put(url, "<p>current</p>", "Pembina Pipeline", False)
+    store.put(url, "<p>archived</p>", "Pembina Pipeline", True)
+    assert list(store.latest("Pembina Pipeline", False)) == [(url, "<p>current</p>")]
+    assert list(store.latest("Pembina Pipeline", True)) == [(url, "<p>archived</p>")]
+
+
+def test_latest_returns_the_newest_snapshot(tmp_path):
+    store = make_store(tmp_path)
+    url = "https://www.enbridge.com/media-center/news/details?id=1"
+    store.put(url, "<p>old</p>", "Enbridge", False)
+    store.put(url, "<p>new</p>", "Enbridge", False)
+    assert list(store.latest("Enbridge", False)) == [(url, "<p>new</p>")]
+    assert store.get(url) == "<p>new</p>"
@@ -0,0 +1,259 @@
+from config import (
+    WAYBACK_ENDPOINT,
+    WAYBACK_PREFIX,
+    WAYBACK_MAX_WORKERS,
+    WAYBACK_RATE,
+    WAYBACK_BURST,
+    WAYBACK_CACHE_PATH,
+    WAYBACK_CACHE_TTL,
+    WAYBACK_CACHE_NEGATIVE_TTL,
+    WAYBACK_CACHE_MAX_ENTRIES,
+    WAYBACK_OFFLINE,
+    WAYBACK_INDEX_PAGE_SIZE,
+    BILL_C59_ROYAL_ASSENT_DATE,
+)
+from http_session import make_session
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+from canonical import canonical_url
+import os
+import sqlite3
+import threading
+import time
+import random
+import re
+
+session = make_session(WAYBACK_MAX_WORKERS)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(
+                        self.capacity, self.tokens + (now - self.updated) * self.rate
+                    )
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+    def back_off(self, wait):
+        # a 429 applies to every worker sharing the endpoint, not just the caller
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + wait)
+            self.tokens = 0
+            self.updated = self.paused_until
+
+
+class WaybackCacheMiss(LookupError):
+    pass
+
+
+class WaybackCache:
+    def __init__(self, path, ttl, negative_ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS cdx (
+                    url TEXT NOT NULL,
+                    to_ts TEXT NOT NULL,
+                    lim INTEGER NOT NULL,
+                    wayback_url TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (url, to_ts, lim)
+                )
+                """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS cdx_accessed ON cdx (accessed_at)"
+            )
+        return self.conn
+
+    def get(self, url, to, limit):
+        # returns (hit, wayback_url); a hit with wayback_url None is a cached "no snapshot"
+        key = (url, str(to or ""), limit)
+        with self.lock:
+            conn = self.connect()
+            row = conn.execute(
+                "SELECT wayback_url, fetched_at FROM cdx WHERE url=? AND to_ts=? AND lim=?",
+                key,
+            ).fetchone()
+            if row is None:
+                return False, None
+            wayback_url, fetched_at = row
+            ttl = self.ttl if wayback_url else self.negative_ttl
+            if time.time() - fetched_at > ttl:
+                return False, None
+            conn.execute(
+                "UPDATE cdx SET accessed_at=? WHERE url=? AND to_ts=? AND lim=?",
+                (time.time(), *key),
+            )
+            conn.commit()
+            return True, wayback_url
+
+    def put(self, url, to, limit, wayback_url):
+        now = time.time()
+        with self.lock:
+            conn = self.connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cdx VALUES (?, ?, ?, ?, ?, ?)",
+                (url, str(to or ""), limit, wayback_url, now, now),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM cdx").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM cdx WHERE rowid IN (SELECT rowid FROM cdx ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            conn.commit()
+
+
+limiter = TokenBucket(WAYBACK_RATE, WAYBACK_BURST)
+cache = WaybackCache(
+    WAYBACK_CACHE_PATH,
+    WAYBACK_CACHE_TTL,
+    WAYBACK_CACHE_NEGATIVE_TTL,
+    WAYBACK_CACHE_MAX_ENTRIES,
+)
+
+
+def query_cdx(payload, max_retries=5):
+    # returns the decoded CDX rows, or None when every attempt failed
+    for attempt in range(max_retries):
+        try:
+            limiter.acquire()
+            res = session.get(
+                WAYBACK_ENDPOINT, params={**payload, "output": "json"}, timeout=25
+            )
+            if res.status_code == 429:
+                wait = 2**attempt + random.uniform(0, 3)
+                print(f"Rate limited (429). Waiting {wait:.1f}s before retrying...")
+                limiter.back_off(wait)
+                continue
+            res.raise_for_status()
+            return res.json() if res.text.strip() else []
+        except Exception as e:
+            print(f"Error fetching {payload['url']}: {e}")
+            time.sleep(2)
+
+
+def fetch_wayback_url(url, max_retries=5, to=None, limit=-1, offline=WAYBACK_OFFLINE):
+    hit, wayback_url = cache.get(url, to, limit)
+    if hit:
+        return wayback_url
+    if offline:
+        raise WaybackCacheMiss(f"No cached CDX result for {url}")
+    data = query_cdx({"url": url, "to": to, "limit": limit}, max_retries)
+    if data is None:
+        return None
+    if len(data) < 2:
+        print(f"No snapshots found: {url}")
+        cache.put(url, to, limit, None)
+        return None
+    header = data[0]
+    values = data[1]
+    record = dict(zip(header, values))
+    wayback_url = f"{WAYBACK_PREFIX}/{record['timestamp']}/{record['original']}"
+    cache.put(url, to, limit, wayback_url)
+    return wayback_url
+
+
+def fetch_wayback_urls(urls, max_workers=WAYBACK_MAX_WORKERS, **kwargs):
+    # results are returned in the same order as urls, None where no snapshot resolved
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            tqdm(
+                executor.map(lambda url: fetch_wayback_url(url, **kwargs), urls),
+                total=len(urls),
+            )
+        )
+
+
+def raw_snapshot_url(url):
+    # the id_ flag makes Wayback serve the archived bytes without its toolbar or
+    # rewritten links; non-Wayback URLs are returned unchanged
+    return re.sub(r"^(https?://web\.archive\.org/web/\d{1,14})/", r"\1id_/", url)
+
+
+class SnapshotIndex:
+    def __init__(self):
+        self.snapshots = {}
+
+    def add(self, timestamp, original):
+        # CDX reports the original URL as captured, which can differ from our
+        # links in the same ways as any other variant
+        key = canonical_url(original)
+        if key not in self.snapshots or timestamp < self.snapshots[key][0]:
+            self.snapshots[key] = (timestamp, original)
+
+    def lookup(self, url):
+        snapshot = self.snapshots.get(canonical_url(url))
+        if snapshot is None:
+            return None
+        timestamp, original = snapshot
+        return f"{WAYBACK_PREFIX}/{timestamp}/{original}"
+
+    def __len__(self):
+        return len(self.snapshots)
+
+
+def fetch_wayback_index(
+    prefixes,
+    to=BILL_C59_ROYAL_ASSENT_DATE,
+    match_type="prefix",
+    index=None,
+):
+    # collapse=urlkey keeps the first capture of each URL, the same snapshot that
+    # fetch_wayback_url(url, limit=1) resolves one request at a time
+    index = index if index is not None else SnapshotIndex()
+    for prefix in prefixes:
+        resume_key = None
+        while True:
+            payload = {
+                "url": prefix,
+                "matchType": match_type,
+                "collapse": "urlkey",
+                "fl": "timestamp,original",
+                "to": to,
+                "limit": WAYBACK_INDEX_PAGE_SIZE,
+                "showResumeKey": "true",
+            }
+            if resume_key:
+                payload["resumeKey"] = resume_key
+            data = query_cdx(payload)
+            if data is None:
+                print(f"Could not index {prefix}, falling back to per-URL lookups")
+                break
+            resume_key = None
+            if len(data) >= 2 and data[-2] == []:
+                resume_key = data[-1][0]
+                data = data[:-2]
+            for timestamp, original in data[1:]:
+                index.add(timestamp, original)
+            if not resume_key:
+                break
+    return index